@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Dict, Any, Optional
+import asyncio
 import logging
 
+from app.core.config import settings
+from app.core.encoding import MEDIA_TYPES, encode, negotiate
 from app.models.schemas import (
     AccidentPredictionRequest,
     AccidentPredictionResponse,
@@ -10,9 +14,15 @@ from app.models.schemas import (
     ModelPerformanceMetrics,
     DataExplorationRequest,
     DataExplorationResponse,
-    HealthCheckResponse
+    HealthCheckResponse,
+    ModelVersionInfo,
+    TrainingJobStatus
 )
-from app.services.ml_service import MLService
+from app.services.ml_service import MLService, ModelNotReady
+from app.services.prediction_batcher import PredictionBatcher
+from app.services.bulk_scoring import BulkScorer, BULK_FORMATS
+from app.services.training_jobs import TrainingJobManager
+from app.services.health_monitor import HealthMonitor
 from app.services.data_service import DataService
 from app.services.analytics_service import AnalyticsService
 
@@ -26,24 +36,66 @@ async def get_ml_service() -> MLService:
     from app.main import ml_service
     return ml_service
 
+# Dependency to get the prediction batcher
+async def get_prediction_batcher() -> PredictionBatcher:
+    from app.main import prediction_batcher
+    return prediction_batcher
+
+# Dependency to get the bulk scorer
+async def get_bulk_scorer() -> BulkScorer:
+    from app.main import bulk_scorer
+    return bulk_scorer
+
+# Dependency to get the training job manager
+async def get_training_jobs() -> TrainingJobManager:
+    from app.main import training_jobs
+    return training_jobs
+
+# Dependency to get the health monitor
+async def get_health_monitor() -> HealthMonitor:
+    from app.main import health_monitor
+    return health_monitor
+
 # Dependency to get data service
 async def get_data_service() -> DataService:
-    return DataService()
+    from app.main import data_service
+    return data_service
 
 # Dependency to get analytics service
 async def get_analytics_service() -> AnalyticsService:
-    return AnalyticsService()
+    from app.main import analytics_service
+    return analytics_service
+
+def encoded_response(content: Any, http_request: Request) -> Response:
+    """Serialize content in the encoding the client's Accept header asks for
+    
+    Bypasses FastAPI's response validation and ``jsonable_encoder`` pass;
+    the content is already a validated response model.
+    """
+    encoding = negotiate(http_request.headers.get('accept'))
+    return Response(encode(content, encoding), media_type=MEDIA_TYPES[encoding], headers={"Vary": "Accept"})
+
+def model_not_ready(e: ModelNotReady) -> HTTPException:
+    """503 for predictions made before the first model is ready, with a hint when to retry"""
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(settings.MODEL_NOT_READY_RETRY_AFTER_SECONDS)}
+    )
 
 @api_router.post("/predict", response_model=AccidentPredictionResponse)
 async def predict_accident_severity(
     request: AccidentPredictionRequest,
-    ml_service: MLService = Depends(get_ml_service)
+    http_request: Request,
+    prediction_batcher: PredictionBatcher = Depends(get_prediction_batcher)
 ):
     """Predict accident severity for a single case"""
     try:
-        prediction = await ml_service.predict(request)
+        prediction = await prediction_batcher.predict(request)
         logger.info(f"Prediction made: {prediction.predicted_severity}")
-        return prediction
+        return encoded_response(prediction, http_request)
+    except ModelNotReady as e:
+        raise model_not_ready(e)
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -51,6 +103,7 @@ async def predict_accident_severity(
 @api_router.post("/predict/batch", response_model=BatchPredictionResponse)
 async def predict_batch(
     request: BatchPredictionRequest,
+    http_request: Request,
     background_tasks: BackgroundTasks,
     ml_service: MLService = Depends(get_ml_service)
 ):
@@ -60,11 +113,7 @@ async def predict_batch(
         import uuid
         
         start_time = time.time()
-        predictions = []
-        
-        for pred_request in request.predictions:
-            prediction = await ml_service.predict(pred_request)
-            predictions.append(prediction)
+        predictions = await ml_service.predict_many(request.predictions)
         
         processing_time = time.time() - start_time
         batch_id = str(uuid.uuid4())
@@ -84,12 +133,43 @@ async def predict_batch(
             processing_time
         )
         
-        return response
-        
+        return encoded_response(response, http_request)
+    
+    except ModelNotReady as e:
+        raise model_not_ready(e)
     except Exception as e:
         logger.error(f"Batch prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/predict/stream")
+async def predict_stream(
+    request: Request,
+    format: Optional[str] = None,
+    bulk_scorer: BulkScorer = Depends(get_bulk_scorer),
+    ml_service: MLService = Depends(get_ml_service)
+):
+    """Score an NDJSON or CSV upload of any size, streaming NDJSON results
+    
+    The format is taken from the ``format`` query parameter, or else from
+    the Content-Type (``text/csv`` for CSV, NDJSON otherwise). Fails with
+    503 before reading the upload if no model is loaded, since errors
+    cannot change the status once the stream has started.
+    """
+    if not ml_service.is_loaded:
+        raise model_not_ready(ModelNotReady())
+    
+    fmt = format or ('csv' if 'csv' in request.headers.get('content-type', '') else 'ndjson')
+    if fmt not in BULK_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format {fmt}, expected one of {BULK_FORMATS}")
+    
+    try:
+        upload = await bulk_scorer.spool(request.stream())
+    except Exception as e:
+        logger.error(f"Bulk upload error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(bulk_scorer.stream(upload, fmt), media_type="application/x-ndjson")
+
 @api_router.get("/model/performance", response_model=ModelPerformanceMetrics)
 async def get_model_performance(
     ml_service: MLService = Depends(get_ml_service)
@@ -102,24 +182,98 @@ async def get_model_performance(
         logger.error(f"Error getting model performance: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.post("/model/retrain")
-async def retrain_model(
-    background_tasks: BackgroundTasks,
+@api_router.get("/model/cache/stats")
+async def get_prediction_cache_stats(
+    ml_service: MLService = Depends(get_ml_service)
+):
+    """Get hit ratio and time saved by the prediction cache"""
+    return ml_service.prediction_cache.get_stats()
+
+@api_router.get("/model/versions", response_model=List[ModelVersionInfo])
+async def list_model_versions(
+    ml_service: MLService = Depends(get_ml_service)
+):
+    """List stored model versions, newest first"""
+    try:
+        return await asyncio.to_thread(ml_service.list_versions)
+    except Exception as e:
+        logger.error(f"Error listing model versions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/model/versions/{version}/activate")
+async def activate_model_version(
+    version: str,
     ml_service: MLService = Depends(get_ml_service)
 ):
-    """Trigger model retraining"""
+    """Serve a stored model version, e.g. to roll back a retrain"""
+    try:
+        await ml_service.activate_version(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+    except Exception as e:
+        logger.error(f"Error activating model version {version}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "message": f"Now serving model version {version}",
+        "model_version": ml_service.model_version
+    }
+
+@api_router.post("/model/retrain", status_code=202)
+async def retrain_model(
+    training_jobs: TrainingJobManager = Depends(get_training_jobs)
+):
+    """Trigger model retraining, or join the retraining already in progress"""
     try:
-        # Add retraining task to background
-        background_tasks.add_task(ml_service.train_model)
+        job, created = training_jobs.submit()
         
         return {
-            "message": "Model retraining initiated",
-            "status": "in_progress"
+            "message": "Model retraining initiated" if created else "Model retraining already in progress",
+            "status": "in_progress",
+            "job_id": job.job_id
         }
     except Exception as e:
         logger.error(f"Error initiating model retraining: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/model/jobs", response_model=List[TrainingJobStatus])
+async def list_training_jobs(
+    training_jobs: TrainingJobManager = Depends(get_training_jobs)
+):
+    """List recent training jobs, newest first"""
+    return training_jobs.list_jobs()
+
+@api_router.get("/model/jobs/stats")
+async def get_training_job_stats(
+    training_jobs: TrainingJobManager = Depends(get_training_jobs)
+):
+    """Get job counts and training durations"""
+    return training_jobs.get_stats()
+
+@api_router.get("/model/jobs/{job_id}", response_model=TrainingJobStatus)
+async def get_training_job(
+    job_id: str,
+    training_jobs: TrainingJobManager = Depends(get_training_jobs)
+):
+    """Get the status and progress of a training job"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return job
+
+@api_router.post("/model/jobs/{job_id}/cancel", response_model=TrainingJobStatus)
+async def cancel_training_job(
+    job_id: str,
+    training_jobs: TrainingJobManager = Depends(get_training_jobs)
+):
+    """Cancel a queued or running training job"""
+    try:
+        return training_jobs.cancel(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @api_router.post("/data/explore", response_model=DataExplorationResponse)
 async def explore_data(
     request: DataExplorationRequest,
@@ -149,6 +303,13 @@ async def get_data_summary(
         logger.error(f"Error getting data summary: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/data/cache/stats")
+async def get_data_cache_stats(
+    data_service: DataService = Depends(get_data_service)
+):
+    """Get hit/miss/eviction counters of the exploration response cache"""
+    return data_service.cache.get_stats()
+
 @api_router.get("/analytics/trends")
 async def get_accident_trends(
     period: str = "monthly",
@@ -188,13 +349,22 @@ async def get_geographical_analysis(
 
 @api_router.get("/health", response_model=HealthCheckResponse)
 async def detailed_health_check(
-    ml_service: MLService = Depends(get_ml_service)
+    deep: bool = False,
+    ml_service: MLService = Depends(get_ml_service),
+    health_monitor: HealthMonitor = Depends(get_health_monitor)
 ):
-    """Detailed health check of all services"""
+    """Health check of all services
+    
+    Answers from the cached canary result; ``deep=true`` runs a full
+    prediction instead.
+    """
     try:
         from datetime import datetime
         
-        ml_status = await ml_service.health_check()
+        if deep:
+            ml_status = await ml_service.health_check()
+        else:
+            ml_status = health_monitor.readiness()
         
         return HealthCheckResponse(
             status="healthy" if ml_status == "healthy" else "unhealthy",
@@ -206,6 +376,13 @@ async def detailed_health_check(
         logger.error(f"Health check error: {e}")
         raise HTTPException(status_code=503, detail=str(e))
 
+@api_router.get("/health/canary")
+async def get_canary_stats(
+    health_monitor: HealthMonitor = Depends(get_health_monitor)
+):
+    """Get the last canary inference result and check counts"""
+    return health_monitor.get_stats()
+
 # Background task functions
 async def log_batch_prediction(batch_id: str, count: int, processing_time: float):
     """Log batch prediction details"""
@@ -0,0 +1,198 @@
+"""Command line tools
+
+Score a CSV or Parquet file of accident records offline with the saved model:
+    
+    python -m app.cli score INPUT OUTPUT [--workers N] [--chunk-size ROWS] [--keep COLUMN ...]
+"""
+import argparse
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.core.logging import setup_logging
+from app.services.bulk_scoring import field_name
+from app.services.ml_service import InferencePlan, MLService
+from app.services.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+
+# Model loaded once per worker process by _init_worker
+_plan: Optional[InferencePlan] = None
+
+def _init_worker(version: str):
+    """Load the model version being scored into a scoring worker
+    
+    Only the compiled plan is needed, not a whole MLService with its
+    inference threads and caches.
+    """
+    global _plan
+    _plan = MLService.load_saved_plan(ModelRegistry(), version)
+    if _plan.booster is not None:
+        # Parallelism comes from the worker processes, not XGBoost threads
+        _plan.booster.set_param('nthread', 1)
+
+
+def _score_chunk(first_row: int, frame: pd.DataFrame, keep: List[str]) -> Tuple[pd.DataFrame, float]:
+    """Score one chunk in a worker; returns the output rows and the CPU time spent"""
+    start = time.process_time()
+    plan = _plan
+    
+    features = MLService._frame_to_matrix(frame.rename(columns=field_name), plan)
+    proba = MLService._predict_proba(plan, features)
+    labels = np.asarray(plan.severity_labels)
+    
+    scored = pd.DataFrame({'row': np.arange(first_row, first_row + len(frame))})
+    for column in keep:
+        scored[column] = frame[column].to_numpy()
+    scored['predicted_severity'] = labels[proba.argmax(axis=1)]
+    scored['confidence_score'] = proba.max(axis=1)
+    for i, label in enumerate(labels):
+        scored[f'probability_{label}'] = proba[:, i]
+    
+    return scored, time.process_time() - start
+
+
+def read_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Read a CSV or Parquet file ``chunk_size`` rows at a time"""
+    if path.suffix.lower() in PARQUET_SUFFIXES:
+        parquet = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file"""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.parquet = path.suffix.lower() in PARQUET_SUFFIXES
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._started = False
+    
+    def write(self, chunk: pd.DataFrame):
+        if self.parquet:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        self._started = True
+    
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score(
+    input_path: Path,
+    output_path: Path,
+    workers: int,
+    chunk_size: int,
+    keep: List[str]
+) -> Dict[str, float]:
+    """Score ``input_path`` into ``output_path`` across ``workers`` processes"""
+    # Validate the model and the input columns up front, not in every worker
+    plan = MLService.load_saved_plan(ModelRegistry())
+    if plan is None:
+        raise RuntimeError("No saved model found; train one first (POST /api/v1/model/retrain)")
+    required = {field for _, field, _ in plan.categorical}
+    required.update(field for _, field in plan.numerical)
+    
+    chunks = read_chunks(input_path, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError(f"{input_path} has no rows")
+    missing = required - {field_name(column) for column in first.columns}
+    missing.update(column for column in keep if column not in first.columns)
+    if missing:
+        raise ValueError(f"{input_path} is missing columns: {', '.join(sorted(missing))}")
+    
+    start = time.perf_counter()
+    rows = 0
+    cpu_seconds = 0.0
+    writer = ChunkWriter(output_path)
+    
+    # spawn rather than fork, as for training; at most two chunks per worker in flight.
+    # Workers load the version validated here, even if another is activated meanwhile
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(plan.version,)
+    ) as pool:
+        pending = deque()
+        
+        def drain(limit: int):
+            nonlocal cpu_seconds
+            while len(pending) > limit:
+                scored, cpu = pending.popleft().result()
+                writer.write(scored)
+                cpu_seconds += cpu
+        
+        try:
+            for chunk in itertools.chain([first], chunks):
+                pending.append(pool.submit(_score_chunk, rows, chunk, keep))
+                rows += len(chunk)
+                drain(2 * workers)
+            drain(0)
+        finally:
+            writer.close()
+    
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "workers": workers,
+        "rows_per_second": rows / elapsed,
+        "rows_per_second_per_core": rows / elapsed / workers,
+        "rows_per_cpu_second": rows / cpu_seconds if cpu_seconds else 0.0
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    score_parser = commands.add_parser("score", help="score a CSV or Parquet file with the saved model")
+    score_parser.add_argument("input", type=Path, help="CSV or Parquet file of accident records")
+    score_parser.add_argument("output", type=Path, help="output file; .parquet/.pq writes Parquet, anything else CSV")
+    score_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="scoring processes")
+    score_parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per chunk")
+    score_parser.add_argument("--keep", action="append", default=[], help="input column to copy to the output")
+    
+    args = parser.parse_args(argv)
+    setup_logging()
+    
+    try:
+        stats = score(args.input, args.output, max(args.workers, 1), args.chunk_size, args.keep)
+    except (RuntimeError, ValueError, OSError) as e:
+        logger.error(f"Scoring failed: {e}")
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    print(
+        f"Scored {stats['rows']} rows in {stats['seconds']:.1f}s with {stats['workers']} workers: "
+        f"{stats['rows_per_second']:.0f} rows/s, {stats['rows_per_second_per_core']:.0f} rows/s per core "
+        f"({stats['rows_per_cpu_second']:.0f} rows per worker CPU second)"
+    )
+
+
+if __name__ == "__main__":
+    main()
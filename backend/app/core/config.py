@@ -27,11 +27,38 @@ class Settings(BaseSettings):
     
     # ML Model settings
     MODEL_PATH: str = "models/"
-    MODEL_VERSION: str = "latest"
+    MODEL_VERSION: str = "latest"  # Registry version served at startup; "latest" is the active one
+    MODEL_REGISTRY_KEEP: int = 10  # Versions kept on disk; older inactive ones are pruned
+    MODEL_REGISTRY_CACHED: int = 3  # Recent versions kept loaded in memory for instant rollback
     RETRAIN_THRESHOLD: float = 0.05  # Retrain if accuracy drops by 5%
+    INFERENCE_FAST_PATH: bool = True  # Predict with the raw booster via inplace_predict
+    INFERENCE_THREADS: int = 4  # Size of the thread pool that runs model inference
+    PREDICTION_CACHE_SIZE: int = 4096  # Max cached prediction outcomes; 0 disables the cache
+    MODEL_NOT_READY_RETRY_AFTER_SECONDS: int = 10  # Retry-After sent with 503s while the first model trains
+    
+    # Micro-batching of concurrent single predictions
+    PREDICTION_BATCH_WINDOW_MS: float = 2.0  # Max time a request waits for others
+    PREDICTION_BATCH_MAX_SIZE: int = 256  # Flush as soon as this many are queued; 1 disables
+    
+    # Streaming bulk scoring (/predict/stream)
+    BULK_SCORING_CHUNK_SIZE: int = 1000  # Records parsed and scored per model call
+    BULK_UPLOAD_SPOOL_BYTES: int = 8 * 1024 * 1024  # Uploads beyond this are spooled to disk
+    
+    # WebSocket fan-out
+    WS_OUTBOX_SIZE: int = 64  # Frames queued per connection before broadcasts are dropped
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0  # A send slower than this disconnects the client
+    WS_MAX_IN_FLIGHT: int = 64  # Prediction frames scored concurrently per connection before reads pause
+    WS_MAX_BATCH_ITEMS: int = 1000  # Requests allowed in one array frame
     
     # File paths
     DATA_PATH: str = "data/"
+    DATASET_FILE: str = "road_accident_dataset.csv"
+    DATASET_CACHE_ENABLED: bool = True  # Cache the parsed CSV as Feather under DATA_PATH
+    
+    # Response cache for /data/explore and /data/summary
+    RESPONSE_CACHE_SIZE: int = 1024  # Max in-process entries; 0 disables the cache
+    RESPONSE_CACHE_TTL_SECONDS: float = 300.0
+    RESPONSE_CACHE_REDIS_ENABLED: bool = False  # Share entries across workers through REDIS_URL
     LOGS_PATH: str = "logs/"
     
     # External APIs
@@ -45,6 +72,7 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: Optional[str] = None
     
     # Monitoring
+    HEALTH_CANARY_INTERVAL_SECONDS: float = 15.0  # Background canary inference period for readiness
     ENABLE_METRICS: bool = True
     LOG_LEVEL: str = "INFO"
     
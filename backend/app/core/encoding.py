@@ -0,0 +1,139 @@
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
+from datetime import datetime
+from enum import Enum
+import json
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+MEDIA_TYPES = {JSON: "application/json", MSGPACK: "application/msgpack"}
+
+# Accept header media type -> encoding
+ENCODING_BY_MEDIA_TYPE = {
+    "application/json": JSON,
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/*": JSON,
+    "*/*": JSON
+}
+
+# (enum class, member) -> the member's position, filled in as members are first seen
+_ENUM_CODES: Dict[tuple, int] = {}
+
+def available_encodings() -> tuple:
+    """Encodings that can be produced with the installed packages"""
+    return (JSON, MSGPACK) if msgpack is not None else (JSON,)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response encoding from an ``Accept`` header, JSON by default"""
+    if not accept:
+        return JSON
+    
+    candidates = []
+    for position, part in enumerate(accept.split(',')):
+        media_type, *params = part.strip().split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encoding = ENCODING_BY_MEDIA_TYPE.get(media_type.strip().lower())
+        if encoding in available_encodings() and quality > 0:
+            candidates.append((-quality, position, encoding))
+    return min(candidates)[2] if candidates else JSON
+
+
+def negotiate_subprotocol(offered: Iterable[str]) -> Optional[str]:
+    """Pick the first WebSocket subprotocol offered by the client that names an encoding"""
+    return next((protocol for protocol in offered if protocol in available_encodings()), None)
+
+
+def encode(content: Any, encoding: str = JSON) -> bytes:
+    """Serialize content, including pydantic models and datetimes
+    
+    JSON is written by orjson when it is installed. msgpack is the compact
+    encoding: enum members are sent as their position in the enum (e.g.
+    ``AccidentSeverity.SEVERE`` as 2) and datetimes as epoch seconds.
+    """
+    if encoding == MSGPACK:
+        return msgpack.packb(content, default=_compact, strict_types=True)
+    if orjson is not None:
+        return orjson.dumps(content, default=_model_dump, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_json_default).encode()
+
+
+def encode_text(content: Any) -> str:
+    """Serialize content as JSON for a WebSocket text frame"""
+    return encode(content, JSON).decode()
+
+
+def decode(frame: Union[str, bytes], encoding: str = JSON) -> Any:
+    """Parse a client frame; binary frames use the connection's encoding
+    
+    Raises ``ValueError`` for a malformed frame.
+    """
+    if isinstance(frame, bytes) and encoding == MSGPACK:
+        return msgpack.unpackb(frame)
+    if orjson is not None:
+        return orjson.loads(frame)
+    return json.loads(frame)
+
+
+def _model_dump(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _compact(value: Any) -> Any:
+    """msgpack ``default`` hook
+    
+    With ``strict_types`` msgpack only packs exact built-in types itself, so
+    this also sees str and int enums and subclasses of dict and list, such
+    as ``OrderedDict`` and ``defaultdict``, which are packed as plain ones.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, Enum):
+        # Keyed by class too: members of two str enums with one value compare equal
+        key = (type(value), value)
+        code = _ENUM_CODES.get(key)
+        if code is None:
+            code = _ENUM_CODES[key] = list(type(value)).index(value)
+        return code
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if hasattr(value, 'item'):
+        # numpy scalars
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not msgpack serializable")
@@ -0,0 +1,218 @@
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+import time
+
+from app.core.config import settings
+
+# Starlette appends "; charset=utf-8" to text/* media types; a second copy makes Prometheus reject the scrape
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; from cached predictions to slow batch and analytics requests
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds; single prediction stages take tens of microseconds
+STAGE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 0.5)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1000, 5000)
+LOAD_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (name, type, help, value) read from a service when metrics are scraped
+Sample = Tuple[str, str, str, float]
+
+class Histogram:
+    """Histogram with buckets preallocated at creation
+    
+    ``observe`` is a bisect and two additions, with no lock and no
+    allocation; counts are made cumulative only when rendered. Inference
+    threads update without locking too, so an observation can very rarely
+    be lost to a thread switch, which is acceptable for monitoring.
+    """
+    
+    __slots__ = ("bounds", "counts", "sum")
+    
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+    
+    def _render(self, name: str, labels: str) -> Iterable[str]:
+        sep = "," if labels else ""
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels}{sep}le="{_format(bound)}"}} {total}'
+        total += self.counts[-1]
+        yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {total}'
+        yield f'{name}_sum{_braces(labels)} {_format(self.sum)}'
+        yield f'{name}_count{_braces(labels)} {total}'
+
+class Counter:
+    """Monotonic counter; ``inc`` is a plain addition"""
+    
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0
+    
+    def inc(self, amount: float = 1):
+        self.value += amount
+    
+    def _render(self, name: str, labels: str) -> Iterable[str]:
+        yield f'{name}{_braces(labels)} {_format(self.value)}'
+
+class MetricFamily:
+    """A named metric and its children, one per combination of label values
+    
+    Children are created on first use and kept, so hot paths can look one
+    up once and hold on to it.
+    """
+    
+    def __init__(self, kind: str, name: str, help: str, labelnames: Tuple[str, ...], factory: Callable[[], Any]):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._factory = factory
+        self.children: Dict[Tuple[str, ...], Any] = {}
+    
+    def labels(self, *values: str):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self._factory()
+        return child
+    
+    def _render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for values, child in list(self.children.items()):
+            labels = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(self.labelnames, values))
+            yield from child._render(self.name, labels)
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered in the Prometheus text format
+    
+    Hot-path metrics are histograms and counters updated in place.
+    Figures that services already keep (cache hits, connection counts) are
+    read by collectors only when ``/metrics`` is scraped, so they cost
+    nothing per request.
+    """
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._families: List[MetricFamily] = []
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+    
+    def histogram(self, name: str, help: str, buckets: Sequence[float], labelnames: Tuple[str, ...] = ()):
+        """Register a histogram; without labels the histogram itself is returned"""
+        family = self._register(MetricFamily("histogram", name, help, labelnames, lambda: Histogram(buckets)))
+        return family if labelnames else family.labels()
+    
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        """Register a counter; without labels the counter itself is returned"""
+        family = self._register(MetricFamily("counter", name, help, labelnames, Counter))
+        return family if labelnames else family.labels()
+    
+    def add_collector(self, collect: Callable[[], Iterable[Sample]]):
+        """Read extra samples from ``collect`` on every scrape"""
+        self._collectors.append(collect)
+    
+    def render(self) -> str:
+        lines = []
+        for family in self._families:
+            lines.extend(family._render())
+        for collect in self._collectors:
+            for name, kind, help, value in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format(value)}")
+        lines.append("")
+        return "\n".join(lines)
+    
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        self._families.append(family)
+        return family
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by method and route template
+    
+    Written against raw ASGI rather than ``BaseHTTPMiddleware`` so a
+    request only pays for two clock reads and one dict lookup. Paths
+    that match no route share one label, so scanners cannot inflate the
+    number of series.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        # (method, route, status) -> its latency histogram and request counter
+        self._series: Dict[Tuple[str, str, int], Tuple[Histogram, Counter]] = {}
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        status = 500
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "unmatched", status)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = (
+                    HTTP_REQUEST_SECONDS.labels(key[0], key[1]),
+                    HTTP_REQUESTS.labels(key[0], key[1], str(status))
+                )
+            series[0].observe(elapsed)
+            series[1].value += 1
+
+
+def _braces(labels: str) -> str:
+    return f"{{{labels}}}" if labels else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+metrics = MetricsRegistry(enabled=settings.ENABLE_METRICS)
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", LATENCY_BUCKETS, ("method", "route")
+)
+HTTP_REQUESTS = metrics.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+PREDICTION_STAGE_SECONDS = metrics.histogram(
+    "prediction_stage_duration_seconds",
+    "Time per MLService prediction stage: encode, risk_factors, inference, and recommendations "
+    "(recommendations and response assembly); path is batch for predict_many, which also scores "
+    "HTTP and WebSocket single predictions coalesced by PredictionBatcher, and single for direct "
+    "MLService.predict calls (health checks, or PREDICTION_BATCH_MAX_SIZE=1)",
+    STAGE_BUCKETS,
+    ("stage", "path")
+)
+PREDICTION_BATCH_SIZE = metrics.histogram(
+    "prediction_batch_size", "Requests per vectorized model call", SIZE_BUCKETS
+)
+DATASET_LOAD_SECONDS = metrics.histogram(
+    "dataset_load_duration_seconds", "Time to load and index the dataset", LOAD_BUCKETS
+)
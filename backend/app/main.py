@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer
@@ -8,31 +9,76 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.encoding import JSON, negotiate_subprotocol
+from app.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, metrics
 from app.api.routes import api_router
+from app.services.dataset_store import DatasetStore
 from app.services.ml_service import MLService
+from app.services.data_service import DataService
+from app.services.analytics_service import AnalyticsService
+from app.services.prediction_batcher import PredictionBatcher
+from app.services.bulk_scoring import BulkScorer
+from app.services.prediction_stream import PredictionStream
 from app.services.websocket_manager import WebSocketManager
+from app.services.training_jobs import TrainingJobManager
+from app.services.health_monitor import HealthMonitor
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
 # Global instances
-ml_service = MLService()
+dataset_store = DatasetStore()
+ml_service = MLService(dataset_store)
+data_service = DataService(dataset_store)
+analytics_service = AnalyticsService(dataset_store)
+prediction_batcher = PredictionBatcher(ml_service)
+bulk_scorer = BulkScorer(ml_service)
 websocket_manager = WebSocketManager()
+training_jobs = TrainingJobManager(ml_service, websocket_manager)
+health_monitor = HealthMonitor(ml_service)
+
+def collect_service_metrics():
+    """Figures the services keep anyway, read when /metrics is scraped"""
+    prediction_cache = ml_service.prediction_cache.get_stats()
+    response_cache = data_service.cache.get_stats()
+    connections = websocket_manager.get_connection_stats(detail=False)
+    return [
+        ("prediction_cache_hits_total", "counter", "Predictions served from the prediction cache", prediction_cache["hits"]),
+        ("prediction_cache_misses_total", "counter", "Predictions that ran the model", prediction_cache["misses"]),
+        ("prediction_cache_entries", "gauge", "Outcomes held in the prediction cache", prediction_cache["entries"]),
+        ("response_cache_hits_total", "counter", "Data and analytics responses served from cache", response_cache["hits"]),
+        ("response_cache_misses_total", "counter", "Data and analytics responses computed", response_cache["misses"]),
+        ("websocket_connections", "gauge", "Open WebSocket connections", connections["active_connections"]),
+        ("websocket_connections_total", "counter", "WebSocket connections accepted", connections["total_connections"]),
+        ("websocket_messages_sent_total", "counter", "WebSocket frames written", connections["sent_messages"]),
+        ("websocket_messages_dropped_total", "counter", "Broadcast frames dropped for slow clients", connections["dropped_messages"])
+    ]
+
+metrics.add_collector(collect_service_metrics)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     logger.info("Starting Accident Prediction API...")
-    await ml_service.initialize()
-    logger.info("ML Service initialized successfully")
+    # The dataset loads on first use; without a saved model, train one in the background
+    if not await ml_service.initialize():
+        training_jobs.submit()
+    else:
+        await health_monitor.check_now()
+    health_monitor.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down Accident Prediction API...")
+    await health_monitor.close()
+    await prediction_batcher.close()
+    await training_jobs.close()
+    await websocket_manager.close()
     await ml_service.cleanup()
+    await data_service.cache.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -61,6 +107,10 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS
 )
 
+# Outermost, so latencies include the other middleware
+if settings.ENABLE_METRICS:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -76,9 +126,9 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint, answered from the cached canary result"""
     try:
-        model_status = await ml_service.health_check()
+        model_status = health_monitor.readiness()
         return {
             "status": "healthy",
             "ml_service": model_status,
@@ -88,29 +138,50 @@ async def health_check():
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
 
+@app.get("/health/live")
+async def liveness_probe():
+    """Liveness probe: the process is up and its event loop is serving"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_probe():
+    """Readiness probe: 503 until the serving model passes its canary inference"""
+    model_status = health_monitor.readiness()
+    ready = model_status == "healthy"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", "ml_service": model_status}
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics in the text exposition format"""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.websocket("/ws/predictions")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time predictions"""
-    await websocket_manager.connect(websocket)
+    """WebSocket endpoint for real-time predictions
+    
+    Clients may pipeline requests: see ``PredictionStream`` for the frame
+    format and how many are scored at once. Offering the ``msgpack``
+    subprotocol switches the connection to compact binary frames.
+    """
+    subprotocol = negotiate_subprotocol(websocket.scope.get("subprotocols", []))
+    await websocket_manager.connect(websocket, subprotocol)
+    stream = PredictionStream(
+        websocket,
+        websocket_manager,
+        ml_service,
+        prediction_batcher,
+        encoding=subprotocol or JSON
+    )
     try:
-        while True:
-            # Wait for prediction requests
-            data = await websocket.receive_json()
-            
-            # Process prediction
-            try:
-                prediction = await ml_service.predict(data)
-                await websocket_manager.send_personal_message(
-                    {"type": "prediction", "data": prediction}, 
-                    websocket
-                )
-            except Exception as e:
-                await websocket_manager.send_personal_message(
-                    {"type": "error", "message": str(e)}, 
-                    websocket
-                )
-                
+        await stream.run()
     except WebSocketDisconnect:
+        pass
+    finally:
         websocket_manager.disconnect(websocket)
 
 if __name__ == "__main__":
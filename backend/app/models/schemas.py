@@ -89,6 +89,35 @@ class AccidentCause(str, Enum):
     MECHANICAL_FAILURE = "Mechanical Failure"
     HUMAN_ERROR = "Human Error"
 
+# Dataset column -> (request field, schema enum)
+CATEGORICAL_FEATURES = {
+    'Country': ('country', Country),
+    'Month': ('month', Month),
+    'Day.of.Week': ('day_of_week', DayOfWeek),
+    'Time.of.Day': ('time_of_day', TimeOfDay),
+    'Urban.Rural': ('urban_rural', UrbanRural),
+    'Road.Type': ('road_type', RoadType),
+    'Weather.Conditions': ('weather_conditions', WeatherConditions),
+    'Driver.Age.Group': ('driver_age_group', DriverAgeGroup),
+    'Driver.Gender': ('driver_gender', DriverGender),
+    'Vehicle.Condition': ('vehicle_condition', VehicleCondition),
+    'Road.Condition': ('road_condition', RoadCondition),
+    'Accident.Cause': ('accident_cause', AccidentCause)
+}
+
+# Dataset column -> request field
+NUMERICAL_FEATURES = {
+    'Visibility.Level': 'visibility_level',
+    'Number.of.Vehicles.Involved': 'number_of_vehicles_involved',
+    'Speed.Limit': 'speed_limit',
+    'Driver.Alcohol.Level': 'driver_alcohol_level',
+    'Driver.Fatigue': 'driver_fatigue',
+    'Pedestrians.Involved': 'pedestrians_involved',
+    'Cyclists.Involved': 'cyclists_involved',
+    'Traffic.Volume': 'traffic_volume',
+    'Population.Density': 'population_density'
+}
+
 class AccidentPredictionRequest(BaseModel):
     """Request model for accident severity prediction"""
     
@@ -155,11 +184,40 @@ class ModelPerformanceMetrics(BaseModel):
     model_version: str
     last_updated: datetime
 
+class ModelVersionInfo(BaseModel):
+    """A model version stored in the registry"""
+    
+    version: str
+    created_at: datetime
+    accuracy: Optional[float] = None
+    active: bool = False
+
+class TrainingJobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class TrainingJobStatus(BaseModel):
+    """Status of a model training job"""
+    
+    job_id: str
+    state: TrainingJobState
+    stage: Optional[str] = None
+    progress: float = Field(0.0, ge=0.0, le=1.0)
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    error: Optional[str] = None
+    metrics: Optional[ModelPerformanceMetrics] = None
+
 class DataExplorationRequest(BaseModel):
     """Request for data exploration"""
     
     feature: str
-    chart_type: str = Field(..., regex="^(histogram|bar|scatter|box|correlation)$")
+    chart_type: str = Field(..., pattern="^(histogram|bar|scatter|box|correlation)$")
     filters: Optional[Dict[str, Any]] = None
 
 class DataExplorationResponse(BaseModel):
@@ -1,62 +1,129 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple, NamedTuple
 import logging
+import asyncio
 from pathlib import Path
 
+from app.services.category_index import CategoryIndex
+from app.services.dataset_store import DatasetStore
+
 logger = logging.getLogger(__name__)
 
+class SeverityAggregates(NamedTuple):
+    """Severity aggregates of one dataset version, computed once and reused"""
+    
+    version: int
+    total: int
+    overall: Optional[pd.Series]  # rows per severity
+    by_month: Optional[pd.DataFrame]  # month x severity counts
+    weather_rates: Optional[pd.DataFrame]  # weather x severity, normalized per weather
+    weather_counts: Optional[Dict[Any, int]]  # rows per weather condition
+    high_speed: Optional[Tuple[int, float]]  # (rows with speed limit > 80, severe rate)
+    by_country: Optional[pd.DataFrame]  # total/severe/Minor/Moderate counts per country
+
 class AnalyticsService:
-    """Service for advanced analytics and insights"""
+    """Service for advanced analytics and insights
     
-    def __init__(self):
-        self.data = None
-        self._load_data()
+    The groupbys and crosstabs behind the endpoints are materialized once per
+    dataset version (see ``SeverityAggregates``), so requests only format
+    per-group results.
+    """
     
-    def _load_data(self):
-        """Load the dataset"""
-        try:
-            data_path = Path("road_accident_dataset.csv")
-            if data_path.exists():
-                self.data = pd.read_csv(data_path)
-                logger.info(f"Loaded dataset for analytics with {len(self.data)} records")
-            else:
-                logger.warning("Dataset not found for analytics")
-                self.data = self._create_sample_data()
-        except Exception as e:
-            logger.error(f"Error loading data for analytics: {e}")
-            self.data = self._create_sample_data()
+    def __init__(self, dataset_store: DatasetStore):
+        self.dataset_store = dataset_store
+        self._aggregates: Optional[SeverityAggregates] = None
+        self._aggregates_lock = asyncio.Lock()
+    
+    async def _get_aggregates(self) -> Optional[SeverityAggregates]:
+        """Return the aggregates for the current dataset, rebuilding them after a reload"""
+        data = await self.dataset_store.get_data()
+        if data is None:
+            return None
+        
+        version = self.dataset_store.version
+        index = self.dataset_store.index
+        if self._aggregates is None or self._aggregates.version != version:
+            async with self._aggregates_lock:
+                if self._aggregates is None or self._aggregates.version != version:
+                    self._aggregates = await asyncio.to_thread(
+                        self._compute_aggregates, data, version, index
+                    )
+        return self._aggregates
     
-    def _create_sample_data(self) -> pd.DataFrame:
-        """Create sample data for testing"""
-        np.random.seed(42)
-        dates = pd.date_range('2023-01-01', '2023-12-31', freq='D')
+    def _compute_aggregates(
+        self, 
+        data: pd.DataFrame, 
+        version: int, 
+        index: Optional[CategoryIndex] = None
+    ) -> SeverityAggregates:
+        """Materialize every aggregate the endpoints need; runs in a worker thread"""
+        has_severity = 'Accident.Severity' in data.columns
+        
+        overall = by_month = weather_rates = weather_counts = high_speed = by_country = None
+        
+        if has_severity:
+            overall = data.groupby('Accident.Severity', observed=True).size()
+        
+        if has_severity and 'Month' in data.columns:
+            by_month = _severity_counts(data, 'Month')
+        
+        if has_severity and 'Weather.Conditions' in data.columns:
+            weather_table = _severity_counts(data, 'Weather.Conditions')
+            weather_rates = weather_table.div(weather_table.sum(axis=1), axis=0)
+            if index is not None and 'Weather.Conditions' in index:
+                counts = index.counts('Weather.Conditions')
+            else:
+                counts = data['Weather.Conditions'].value_counts()
+            weather_counts = {weather: int(count) for weather, count in counts.items()}
+        
+        if 'Speed.Limit' in data.columns:
+            high_speed_mask = data['Speed.Limit'] > 80
+            high_speed_count = int(high_speed_mask.sum())
+            if high_speed_count > 0:
+                high_speed = (
+                    high_speed_count,
+                    float((data['Accident.Severity'][high_speed_mask] == 'Severe').mean())
+                )
+        
+        if has_severity and 'Country' in data.columns:
+            # One vectorized pass for every (country, severity) count
+            counts = _severity_counts(data, 'Country')
+            totals = counts.sum(axis=1)
+            counts = counts.reindex(columns=['Minor', 'Moderate', 'Severe'], fill_value=0)
+            by_country = pd.DataFrame({
+                'total_accidents': totals,
+                'severe_accidents': counts['Severe'],
+                'Minor': counts['Minor'],
+                'Moderate': counts['Moderate']
+            })
         
-        return pd.DataFrame({
-            'Date': np.random.choice(dates, 1000),
-            'Country': np.random.choice(['USA', 'UK', 'Canada', 'India'], 1000),
-            'Month': np.random.choice(['January', 'February', 'March', 'April'], 1000),
-            'Accident.Severity': np.random.choice(['Minor', 'Moderate', 'Severe'], 1000, p=[0.5, 0.3, 0.2]),
-            'Weather.Conditions': np.random.choice(['Clear', 'Rainy', 'Snowy', 'Foggy'], 1000),
-            'Speed.Limit': np.random.randint(30, 120, 1000),
-            'Driver.Age.Group': np.random.choice(['18-25', '26-40', '41-60', '60+'], 1000)
-        })
+        return SeverityAggregates(
+            version=version,
+            total=len(data),
+            overall=overall,
+            by_month=by_month,
+            weather_rates=weather_rates,
+            weather_counts=weather_counts,
+            high_speed=high_speed,
+            by_country=by_country
+        )
     
     async def get_accident_trends(self, period: str = "monthly") -> Dict[str, Any]:
         """Get accident trends over time"""
         try:
-            if self.data is None:
+            aggregates = await self._get_aggregates()
+            if aggregates is None:
                 return {"error": "No data available"}
             
             # Group by period
-            if period == "monthly" and 'Month' in self.data.columns:
-                grouped = self.data.groupby(['Month', 'Accident.Severity']).size().unstack(fill_value=0)
+            if period == "monthly" and aggregates.by_month is not None:
+                grouped = aggregates.by_month
             else:
                 # Default grouping
-                grouped = self.data.groupby('Accident.Severity').size()
                 return {
                     "period": "overall",
-                    "data": grouped.to_dict()
+                    "data": aggregates.overall.to_dict()
                 }
             
             # Convert to format suitable for frontend
@@ -74,8 +141,8 @@ class AnalyticsService:
                 "period": period,
                 "data": trends_data,
                 "summary": {
-                    "total_accidents": len(self.data),
-                    "avg_per_period": len(self.data) / len(trends_data) if trends_data else 0
+                    "total_accidents": aggregates.total,
+                    "avg_per_period": aggregates.total / len(trends_data) if trends_data else 0
                 }
             }
             
@@ -86,18 +153,15 @@ class AnalyticsService:
     async def analyze_risk_factors(self) -> Dict[str, Any]:
         """Analyze key risk factors"""
         try:
-            if self.data is None:
+            aggregates = await self._get_aggregates()
+            if aggregates is None:
                 return {"error": "No data available"}
             
             risk_factors = []
             
             # Analyze weather conditions
-            if 'Weather.Conditions' in self.data.columns and 'Accident.Severity' in self.data.columns:
-                weather_severity = pd.crosstab(
-                    self.data['Weather.Conditions'], 
-                    self.data['Accident.Severity'], 
-                    normalize='index'
-                )
+            if aggregates.weather_rates is not None:
+                weather_severity = aggregates.weather_rates
                 
                 for weather in weather_severity.index:
                     severe_rate = weather_severity.loc[weather].get('Severe', 0)
@@ -105,27 +169,25 @@ class AnalyticsService:
                         "factor": f"Weather: {weather}",
                         "severe_rate": float(severe_rate),
                         "impact_score": float(severe_rate * 100),
-                        "frequency": int(self.data[self.data['Weather.Conditions'] == weather].shape[0])
+                        "frequency": aggregates.weather_counts[weather]
                     })
             
             # Analyze speed limits
-            if 'Speed.Limit' in self.data.columns:
-                high_speed = self.data[self.data['Speed.Limit'] > 80]
-                if len(high_speed) > 0:
-                    severe_rate = (high_speed['Accident.Severity'] == 'Severe').mean()
-                    risk_factors.append({
-                        "factor": "High Speed Limit (>80 km/h)",
-                        "severe_rate": float(severe_rate),
-                        "impact_score": float(severe_rate * 100),
-                        "frequency": len(high_speed)
-                    })
+            if aggregates.high_speed is not None:
+                frequency, severe_rate = aggregates.high_speed
+                risk_factors.append({
+                    "factor": "High Speed Limit (>80 km/h)",
+                    "severe_rate": severe_rate,
+                    "impact_score": float(severe_rate * 100),
+                    "frequency": frequency
+                })
             
             # Sort by impact score
             risk_factors.sort(key=lambda x: x['impact_score'], reverse=True)
             
             return {
                 "risk_factors": risk_factors[:10],  # Top 10
-                "total_analyzed": len(self.data),
+                "total_analyzed": aggregates.total,
                 "methodology": "Cross-tabulation analysis of categorical factors vs severity"
             }
             
@@ -136,17 +198,14 @@ class AnalyticsService:
     async def get_geographical_analysis(self) -> Dict[str, Any]:
         """Get geographical analysis of accidents"""
         try:
-            if self.data is None:
+            aggregates = await self._get_aggregates()
+            if aggregates is None:
                 return {"error": "No data available"}
             
             geographical_data = []
             
-            if 'Country' in self.data.columns and 'Accident.Severity' in self.data.columns:
-                country_stats = self.data.groupby('Country').agg({
-                    'Accident.Severity': ['count', lambda x: (x == 'Severe').sum()]
-                }).round(2)
-                
-                country_stats.columns = ['total_accidents', 'severe_accidents']
+            if aggregates.by_country is not None:
+                country_stats = aggregates.by_country
                 
                 for country in country_stats.index:
                     total = int(country_stats.loc[country, 'total_accidents'])
@@ -158,10 +217,8 @@ class AnalyticsService:
                         "severe_accidents": severe,
                         "severe_rate": float(severe / total) if total > 0 else 0,
                         "severity_distribution": {
-                            "Minor": int(self.data[(self.data['Country'] == country) & 
-                                                 (self.data['Accident.Severity'] == 'Minor')].shape[0]),
-                            "Moderate": int(self.data[(self.data['Country'] == country) & 
-                                                    (self.data['Accident.Severity'] == 'Moderate')].shape[0]),
+                            "Minor": int(country_stats.loc[country, 'Minor']),
+                            "Moderate": int(country_stats.loc[country, 'Moderate']),
                             "Severe": severe
                         }
                     })
@@ -170,10 +227,45 @@ class AnalyticsService:
                 "geographical_data": geographical_data,
                 "summary": {
                     "countries_analyzed": len(geographical_data),
-                    "total_accidents": len(self.data)
+                    "total_accidents": aggregates.total
                 }
             }
             
         except Exception as e:
             logger.error(f"Error in geographical analysis: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+
+def _severity_counts(data: pd.DataFrame, column: str) -> pd.DataFrame:
+    """Rows per (column value, severity) in one vectorized pass
+    
+    Equivalent to ``groupby([column, 'Accident.Severity'], observed=True)
+    .size().unstack(fill_value=0)``; for categorical columns the pairs are
+    counted straight from the category codes with a single ``bincount``.
+    """
+    key = data[column]
+    severity = data['Accident.Severity']
+    
+    if not (isinstance(key.dtype, pd.CategoricalDtype) and isinstance(severity.dtype, pd.CategoricalDtype)):
+        return data.groupby([column, 'Accident.Severity'], observed=True).size().unstack(fill_value=0)
+    
+    key_codes = key.cat.codes.to_numpy(dtype=np.int64)
+    severity_codes = severity.cat.codes.to_numpy(dtype=np.int64)
+    n_keys = len(key.cat.categories)
+    n_severities = len(severity.cat.categories)
+    
+    # Code -1 marks missing values, which groupby drops
+    valid = (key_codes >= 0) & (severity_codes >= 0)
+    counts = np.bincount(
+        key_codes[valid] * n_severities + severity_codes[valid],
+        minlength=n_keys * n_severities
+    ).reshape(n_keys, n_severities)
+    
+    table = pd.DataFrame(
+        counts,
+        index=pd.Index(key.cat.categories, name=column),
+        columns=pd.Index(severity.cat.categories, name='Accident.Severity')
+    )
+    
+    # Drop values that never occur, as observed=True would
+    return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
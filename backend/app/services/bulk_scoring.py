@@ -0,0 +1,160 @@
+from typing import Dict, List, Any, AsyncIterator, Iterable, Iterator, Optional, Tuple, IO
+import asyncio
+import csv
+import io
+import itertools
+import json
+import logging
+import tempfile
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.schemas import (
+    AccidentPredictionRequest,
+    AccidentPredictionResponse,
+    CATEGORICAL_FEATURES,
+    NUMERICAL_FEATURES
+)
+from app.services.ml_service import MLService
+
+logger = logging.getLogger(__name__)
+
+# Dataset column -> request field, so historical exports can be scored as-is
+FIELD_BY_COLUMN = {
+    **{col: field for col, (field, _) in CATEGORICAL_FEATURES.items()},
+    **NUMERICAL_FEATURES
+}
+
+BULK_FORMATS = ('ndjson', 'csv')
+
+def field_name(column: str) -> str:
+    """Map a CSV header or NDJSON key to a request field name"""
+    normalized = column.strip().replace(' ', '.').replace('/', '.')
+    return FIELD_BY_COLUMN.get(normalized, column.strip())
+
+
+def parse_records(
+    records: Iterable[Any],
+    first_row: int = 1
+) -> Tuple[List[AccidentPredictionRequest], List[int], Dict[int, str]]:
+    """Validate raw records into prediction requests
+    
+    Returns the valid requests, their row numbers and an error message per
+    invalid row number.
+    """
+    requests = []
+    rows = []
+    errors = {}
+    for row, record in enumerate(records, start=first_row):
+        if isinstance(record, Exception):
+            errors[row] = str(record)
+            continue
+        if not isinstance(record, dict):
+            errors[row] = "Expected an object with the prediction fields"
+            continue
+        try:
+            # CSV rows with more cells than headers put the extras under None
+            fields = {field_name(k): v for k, v in record.items() if k is not None}
+            requests.append(AccidentPredictionRequest(**fields))
+            rows.append(row)
+        except ValidationError as e:
+            errors[row] = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+    return requests, rows, errors
+
+
+def iter_records(upload: IO[bytes], fmt: str) -> Iterator[Any]:
+    """Lazily decode records from an NDJSON or CSV byte stream"""
+    # Undecodable bytes turn into validation errors on their row
+    text = io.TextIOWrapper(upload, encoding='utf-8', errors='replace', newline='')
+    if fmt == 'csv':
+        yield from csv.DictReader(text)
+        return
+    
+    for line in text:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                # Reported as a per-row error by parse_records
+                yield ValueError(f"Invalid JSON: {e.msg}")
+
+
+class BulkScorer:
+    """Score arbitrarily large NDJSON or CSV uploads in fixed-size chunks
+    
+    The upload is spooled to a temporary file (in memory up to
+    ``BULK_UPLOAD_SPOOL_BYTES``, on disk beyond), then read back
+    ``chunk_size`` records at a time. Each chunk goes through
+    ``MLService.predict_many`` and is streamed out as NDJSON, one line per
+    input record in input order, so memory stays bounded by the chunk size
+    rather than the upload size. Every line carries its input ``"row"``
+    number; invalid records produce ``{"row": n, "error": ...}`` lines
+    instead of failing the stream.
+    """
+    
+    def __init__(self, ml_service: MLService, chunk_size: Optional[int] = None):
+        self.ml_service = ml_service
+        self.chunk_size = chunk_size or settings.BULK_SCORING_CHUNK_SIZE
+    
+    async def spool(self, body: AsyncIterator[bytes]) -> IO[bytes]:
+        """Copy a request body into a temporary file without holding it in memory"""
+        upload = tempfile.SpooledTemporaryFile(max_size=settings.BULK_UPLOAD_SPOOL_BYTES)
+        async for chunk in body:
+            upload.write(chunk)
+        upload.seek(0)
+        return upload
+    
+    async def stream(self, upload: IO[bytes], fmt: str) -> AsyncIterator[bytes]:
+        """Yield NDJSON result chunks for every record in ``upload``"""
+        try:
+            records = iter_records(upload, fmt)
+            first_row = 1
+            total = 0
+            while True:
+                chunk = await asyncio.to_thread(self._read_chunk, records, first_row)
+                if chunk is None:
+                    break
+                requests, rows, errors, count = chunk
+                
+                predictions = await self.ml_service.predict_many(requests)
+                yield await asyncio.to_thread(self._encode_chunk, predictions, rows, errors)
+                
+                first_row += count
+                total += count
+            logger.info(f"Bulk scoring completed - {total} records, {fmt}")
+        except Exception as e:
+            logger.error(f"Bulk scoring error: {e}")
+            raise
+        finally:
+            upload.close()
+    
+    def _read_chunk(
+        self,
+        records: Iterator[Any],
+        first_row: int
+    ) -> Optional[Tuple[List[AccidentPredictionRequest], List[int], Dict[int, str], int]]:
+        """Decode and validate the next chunk; runs in a worker thread"""
+        batch = list(itertools.islice(records, self.chunk_size))
+        if not batch:
+            return None
+        requests, rows, errors = parse_records(batch, first_row)
+        return requests, rows, errors, len(batch)
+    
+    @staticmethod
+    def _encode_chunk(
+        predictions: List[AccidentPredictionResponse],
+        rows: List[int],
+        errors: Dict[int, str]
+    ) -> bytes:
+        """Serialize one chunk as NDJSON in input order; runs in a worker thread"""
+        # Splice the row number into the serialized prediction rather than re-encoding it
+        lines = {
+            row: f'{{"row": {row}, {prediction.model_dump_json()[1:]}'
+            for row, prediction in zip(rows, predictions)
+        }
+        lines.update({row: json.dumps({"row": row, "error": error}) for row, error in errors.items()})
+        return "".join(lines[row] + "\n" for row in sorted(lines)).encode()
@@ -0,0 +1,111 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Iterable, Optional, Tuple
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class _Postings:
+    """Row positions of one categorical column, grouped by category code"""
+    
+    def __init__(self, series: pd.Series):
+        categories = series.cat.categories
+        self.codes = series.cat.codes.to_numpy()
+        self.lookup = {value: code for code, value in enumerate(categories)}
+        self.counts = np.bincount(self.codes[self.codes >= 0], minlength=len(categories))
+        self.offsets = np.concatenate(([0], np.cumsum(self.counts)))
+        
+        # A stable sort keeps positions ascending within each code; missing
+        # values (code -1) sort first and are dropped
+        order = np.argsort(self.codes, kind='stable')[len(self.codes) - self.offsets[-1]:]
+        self.order = order.astype(np.int32) if len(self.codes) < 2**31 else order
+        self.categories = categories
+    
+    def code(self, value: Any) -> Optional[int]:
+        """Category code of ``value``; -1 if it never occurs, None if it cannot be looked up"""
+        try:
+            return self.lookup.get(value, -1)
+        except TypeError:
+            return None
+    
+    def rows(self, code: int) -> np.ndarray:
+        if code < 0:
+            return self.order[:0]
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+
+class CategoryIndex:
+    """Inverted index over the categorical columns of one dataset version
+    
+    For every indexed column the row positions of each category are kept
+    contiguous and ascending, so an equality filter is a slice lookup and a
+    multi-filter query only touches the rows of its most selective filter.
+    """
+    
+    def __init__(self, postings: Dict[str, _Postings], n_rows: int):
+        self._postings = postings
+        self.n_rows = n_rows
+    
+    @classmethod
+    def build(cls, data: pd.DataFrame, columns: Iterable[str]) -> "CategoryIndex":
+        """Index those of ``columns`` that are stored as categoricals in ``data``"""
+        start = time.perf_counter()
+        postings = {
+            col: _Postings(data[col])
+            for col in columns
+            if col in data.columns and isinstance(data[col].dtype, pd.CategoricalDtype)
+        }
+        logger.info(
+            f"Built category index over {len(postings)} columns "
+            f"in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+        return cls(postings, len(data))
+    
+    def __contains__(self, column: str) -> bool:
+        return column in self._postings
+    
+    def rows(self, column: str, value: Any) -> np.ndarray:
+        """Ascending positions of the rows where ``column == value``"""
+        postings = self._postings[column]
+        code = postings.code(value)
+        if code is None:
+            raise TypeError(f"Unhashable filter value for {column}: {value!r}")
+        return postings.rows(code)
+    
+    def counts(self, column: str) -> pd.Series:
+        """Rows per category, like ``value_counts(sort=False)`` on the column"""
+        postings = self._postings[column]
+        return pd.Series(postings.counts, index=postings.categories, name='count')
+    
+    def select(self, filters: Dict[str, Any]) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+        """Resolve the indexed equality ``filters``
+        
+        Returns the ascending positions of the rows matching all of them
+        (None when no filter is indexed) and the filters left for the caller
+        to evaluate.
+        """
+        matched = []
+        remaining = {}
+        for key, value in filters.items():
+            postings = self._postings.get(key)
+            code = postings.code(value) if postings is not None else None
+            if code is None:
+                remaining[key] = value
+            else:
+                matched.append((postings, code))
+        
+        if not matched:
+            return None, remaining
+        
+        # Start from the shortest posting list and check the other filters
+        # against the codes of just those rows
+        matched.sort(key=lambda item: item[0].counts[item[1]] if item[1] >= 0 else 0)
+        postings, code = matched[0]
+        # Gathers are much faster with native-width indices than int32 ones
+        positions = postings.rows(code).astype(np.intp)
+        for postings, code in matched[1:]:
+            if len(positions) == 0:
+                break
+            positions = positions[postings.codes[positions] == code]
+        return positions, remaining
@@ -6,38 +6,22 @@ from pathlib import Path
 
 from app.core.config import settings
 from app.models.schemas import DataExplorationResponse
+from app.services.category_index import CategoryIndex
+from app.services.dataset_store import DatasetStore
+from app.services.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
 class DataService:
-    """Service for data exploration and analysis"""
+    """Service for data exploration and analysis
     
-    def __init__(self):
-        self.data = None
-        self._load_data()
+    Responses are pure functions of the request and the dataset version, so
+    they are served from a ``ResponseCache`` keyed on both.
+    """
     
-    def _load_data(self):
-        """Load the dataset"""
-        try:
-            data_path = Path("road_accident_dataset.csv")
-            if data_path.exists():
-                self.data = pd.read_csv(data_path)
-                logger.info(f"Loaded dataset with {len(self.data)} records")
-            else:
-                logger.warning("Dataset not found")
-                self.data = self._create_sample_data()
-        except Exception as e:
-            logger.error(f"Error loading data: {e}")
-            self.data = self._create_sample_data()
-    
-    def _create_sample_data(self) -> pd.DataFrame:
-        """Create sample data for testing"""
-        return pd.DataFrame({
-            'Country': ['USA', 'UK', 'Canada'] * 100,
-            'Accident.Severity': ['Minor', 'Moderate', 'Severe'] * 100,
-            'Speed.Limit': np.random.randint(30, 120, 300),
-            'Visibility.Level': np.random.uniform(50, 500, 300)
-        })
+    def __init__(self, dataset_store: DatasetStore, cache: Optional[ResponseCache] = None):
+        self.dataset_store = dataset_store
+        self.cache = cache if cache is not None else ResponseCache()
     
     async def explore_feature(
         self, 
@@ -47,43 +31,112 @@ class DataService:
     ) -> DataExplorationResponse:
         """Explore a specific feature"""
         try:
-            if self.data is None:
+            data = await self.dataset_store.get_data()
+            if data is None:
                 raise ValueError("No data available")
+            # One snapshot of the store: a reload during the awaits below must
+            # not pair this data with another version's index or cache key
+            index = self.dataset_store.index
+            fingerprint = self.dataset_store.fingerprint
             
-            # Apply filters if provided
-            filtered_data = self.data.copy()
-            if filters:
-                for key, value in filters.items():
-                    if key in filtered_data.columns:
-                        filtered_data = filtered_data[filtered_data[key] == value]
-            
-            # Generate chart data based on type
-            chart_data = self._generate_chart_data(filtered_data, feature, chart_type)
-            
-            # Calculate statistics
-            statistics = self._calculate_statistics(filtered_data, feature)
-            
-            # Generate insights
-            insights = self._generate_insights(filtered_data, feature)
-            
-            return DataExplorationResponse(
-                chart_data=chart_data,
-                statistics=statistics,
-                insights=insights
+            key = self.cache.make_key(
+                "explore", 
+                fingerprint, 
+                feature=feature, 
+                chart_type=chart_type, 
+                filters=filters or {}
             )
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return DataExplorationResponse(**cached)
+            
+            response = self._explore(data, index, feature, chart_type, filters)
+            await self.cache.set(key, response.model_dump())
+            return response
             
         except Exception as e:
             logger.error(f"Error exploring feature {feature}: {e}")
             raise
     
-    def _generate_chart_data(self, data: pd.DataFrame, feature: str, chart_type: str) -> Dict[str, Any]:
-        """Generate chart data based on chart type"""
+    def _explore(
+        self, 
+        data: pd.DataFrame, 
+        index: Optional[CategoryIndex], 
+        feature: str, 
+        chart_type: str, 
+        filters: Optional[Dict[str, Any]]
+    ) -> DataExplorationResponse:
+        """Compute an exploration response from scratch"""
         if feature not in data.columns:
-            return {"error": f"Feature {feature} not found"}
+            return DataExplorationResponse(
+                chart_data={"error": f"Feature {feature} not found"},
+                statistics={"error": f"Feature {feature} not found"},
+                insights=["Feature not found in dataset"]
+            )
+        
+        # Apply filters if provided
+        values = self._select(data, index, feature, filters)
+        
+        # Generate chart data based on type
+        chart_data = self._generate_chart_data(values, chart_type)
+        
+        # Calculate statistics
+        statistics = self._calculate_statistics(values)
+        
+        # Generate insights
+        insights = self._generate_insights(values)
         
+        return DataExplorationResponse(
+            chart_data=chart_data,
+            statistics=statistics,
+            insights=insights
+        )
+    
+    def _select(
+        self, 
+        data: pd.DataFrame, 
+        index: Optional[CategoryIndex], 
+        feature: str, 
+        filters: Optional[Dict[str, Any]]
+    ) -> pd.Series:
+        """Return the feature column restricted to the rows matching every filter
+        
+        Filters on indexed categorical columns are answered from ``index``,
+        the ``CategoryIndex`` loaded with ``data``; any others are checked on
+        just the rows it returns, or combined into one boolean mask when no
+        filter is indexed. Only the requested column is materialized; the
+        table itself is never copied.
+        """
+        filters = {key: value for key, value in (filters or {}).items() if key in data.columns}
+        column = data[feature]
+        
+        positions = None
+        if index is not None and index.n_rows == len(data):
+            positions, filters = index.select(filters)
+        
+        if positions is not None:
+            for key, value in filters.items():
+                if len(positions) == 0:
+                    break
+                positions = positions[(data[key].iloc[positions] == value).to_numpy()]
+            return column.iloc[positions]
+        
+        mask = None
+        for key, value in filters.items():
+            matches = (data[key] == value).to_numpy()
+            if mask is None:
+                mask = matches
+            else:
+                np.logical_and(mask, matches, out=mask)
+        
+        return column if mask is None else column[mask]
+    
+    def _generate_chart_data(self, values: pd.Series, chart_type: str) -> Dict[str, Any]:
+        """Generate chart data based on chart type"""
         if chart_type == "histogram":
-            if data[feature].dtype in ['int64', 'float64']:
-                hist, bins = np.histogram(data[feature].dropna(), bins=20)
+            if self._is_numeric(values):
+                # Bin in float64 so narrowed dtypes produce the same edges
+                hist, bins = np.histogram(values.dropna().astype(np.float64), bins=20)
                 return {
                     "type": "histogram",
                     "bins": bins.tolist(),
@@ -91,8 +144,8 @@ class DataService:
                 }
         
         elif chart_type == "bar":
-            if data[feature].dtype == 'object':
-                value_counts = data[feature].value_counts()
+            if self._is_categorical(values):
+                value_counts = self._value_counts(values)
                 return {
                     "type": "bar",
                     "labels": value_counts.index.tolist(),
@@ -101,14 +154,12 @@ class DataService:
         
         return {"type": chart_type, "message": "Chart data generation not implemented"}
     
-    def _calculate_statistics(self, data: pd.DataFrame, feature: str) -> Dict[str, Any]:
+    def _calculate_statistics(self, values: pd.Series) -> Dict[str, Any]:
         """Calculate basic statistics for a feature"""
-        if feature not in data.columns:
-            return {"error": f"Feature {feature} not found"}
-        
-        series = data[feature].dropna()
+        series = self._widen(values.dropna())
+        missing = int(values.isna().sum())
         
-        if series.dtype in ['int64', 'float64']:
+        if self._is_numeric(series):
             return {
                 "count": len(series),
                 "mean": float(series.mean()),
@@ -116,33 +167,30 @@ class DataService:
                 "std": float(series.std()),
                 "min": float(series.min()),
                 "max": float(series.max()),
-                "missing": data[feature].isna().sum()
+                "missing": missing
             }
         else:
             return {
                 "count": len(series),
-                "unique": series.nunique(),
+                "unique": int(series.nunique()),
                 "top": series.mode().iloc[0] if len(series.mode()) > 0 else None,
-                "freq": series.value_counts().iloc[0] if len(series) > 0 else 0,
-                "missing": data[feature].isna().sum()
+                "freq": int(self._value_counts(series).iloc[0]) if len(series) > 0 else 0,
+                "missing": missing
             }
     
-    def _generate_insights(self, data: pd.DataFrame, feature: str) -> List[str]:
+    def _generate_insights(self, values: pd.Series) -> List[str]:
         """Generate insights about the feature"""
         insights = []
         
-        if feature not in data.columns:
-            return ["Feature not found in dataset"]
-        
-        series = data[feature].dropna()
+        series = self._widen(values.dropna())
         
         # Missing data insight
-        missing_pct = (data[feature].isna().sum() / len(data)) * 100
+        missing_pct = (values.isna().sum() / len(values)) * 100
         if missing_pct > 5:
             insights.append(f"High missing data: {missing_pct:.1f}% of values are missing")
         
         # Data type specific insights
-        if series.dtype in ['int64', 'float64']:
+        if self._is_numeric(series):
             # Numerical insights
             if series.std() / series.mean() > 1:
                 insights.append("High variability detected in the data")
@@ -161,7 +209,7 @@ class DataService:
                 insights.append("High cardinality: Many unique values detected")
             
             # Check for imbalanced categories
-            value_counts = series.value_counts()
+            value_counts = self._value_counts(series)
             if len(value_counts) > 1:
                 ratio = value_counts.iloc[0] / value_counts.iloc[-1]
                 if ratio > 10:
@@ -169,23 +217,53 @@ class DataService:
         
         return insights if insights else ["No significant patterns detected"]
     
+    @staticmethod
+    def _is_numeric(series: pd.Series) -> bool:
+        """Whether a column holds numbers (of any width)"""
+        return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    
+    @staticmethod
+    def _is_categorical(series: pd.Series) -> bool:
+        """Whether a column holds labels, either as strings or as a categorical"""
+        return series.dtype == 'object' or isinstance(series.dtype, pd.CategoricalDtype)
+    
+    @staticmethod
+    def _widen(series: pd.Series) -> pd.Series:
+        """Compute float statistics in float64 even for columns stored as float32"""
+        if pd.api.types.is_float_dtype(series) and series.dtype != np.float64:
+            return series.astype(np.float64)
+        return series
+    
+    @staticmethod
+    def _value_counts(series: pd.Series) -> pd.Series:
+        """Value counts without the zero rows categoricals report for unused categories"""
+        counts = series.value_counts()
+        return counts[counts > 0]
+    
     async def get_summary_statistics(self) -> Dict[str, Any]:
         """Get overall dataset summary statistics"""
         try:
-            if self.data is None:
+            data = await self.dataset_store.get_data()
+            if data is None:
                 return {"error": "No data available"}
             
+            key = self.cache.make_key("summary", self.dataset_store.fingerprint)
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+            
             summary = {
-                "total_records": len(self.data),
-                "feature_count": len(self.data.columns),
-                "missing_data": self.data.isna().sum().to_dict(),
-                "data_types": self.data.dtypes.astype(str).to_dict(),
+                "total_records": len(data),
+                "feature_count": len(data.columns),
+                "missing_data": data.isna().sum().to_dict(),
+                "data_types": data.dtypes.astype(str).to_dict(),
             }
             
             # Add severity distribution if available
-            if 'Accident.Severity' in self.data.columns:
-                summary["severity_distribution"] = self.data['Accident.Severity'].value_counts().to_dict()
+            if 'Accident.Severity' in data.columns:
+                summary["severity_distribution"] = data['Accident.Severity'].value_counts().to_dict()
             
+            await self.cache.set(key, summary)
             return summary
             
         except Exception as e:
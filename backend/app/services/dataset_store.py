@@ -0,0 +1,235 @@
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+from pyarrow import feather
+from typing import Dict, Any, Optional, Tuple
+import logging
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.metrics import DATASET_LOAD_SECONDS, metrics as metrics_registry
+from app.models.schemas import CATEGORICAL_FEATURES
+from app.services.category_index import CategoryIndex
+
+logger = logging.getLogger(__name__)
+
+# Schema columns stored as pandas categoricals
+CATEGORY_COLUMNS = list(CATEGORICAL_FEATURES) + ['Accident.Severity']
+
+# Other string columns become categoricals below this unique/rows ratio
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Bump whenever _normalize changes what ends up in the cache
+CACHE_FORMAT_VERSION = 3
+
+# Arrow schema metadata key holding the dtype savings measured when the CSV was parsed
+MEMORY_REPORT_KEY = b"memory_report"
+
+class DatasetStore:
+    """Process-wide holder for the accident dataset
+    
+    The CSV is parsed once, on first use, and shared by the ML, data and
+    analytics services. Every access stats the file and reloads it only when its
+    mtime has changed; ``version`` is bumped on each reload so callers can
+    key derived state on it.
+    
+    Parsed data is cached as an Arrow IPC (Feather) file under
+    ``settings.DATA_PATH``, named after a content hash of the CSV, so
+    later loads skip text parsing and type inference entirely.
+    
+    Each version also carries a ``CategoryIndex`` over its categorical
+    schema columns, rebuilt together with the data so the two always match.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or settings.DATASET_FILE)
+        self.data: Optional[pd.DataFrame] = None
+        self.index: Optional[CategoryIndex] = None
+        self.version = 0
+        self.load_time: Optional[float] = None
+        # Per-column dtype savings from the last CSV parse (empty on cache hits)
+        self.memory_report: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[int] = None
+        self._static = False
+        self._lock = asyncio.Lock()
+        self._instance = uuid.uuid4().hex
+    
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> "DatasetStore":
+        """Create a store around an in-memory DataFrame that never reloads"""
+        store = cls()
+        store.data = data
+        store.index = CategoryIndex.build(data, CATEGORY_COLUMNS)
+        store.version = 1
+        store._static = True
+        return store
+    
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the loaded data, also across processes reading the same file"""
+        if self._mtime is None:
+            return f"{self._instance}.{self.version}"
+        return f"{self.path.name}.{self._mtime}"
+    
+    async def load(self):
+        """Load (or reload) the dataset"""
+        async with self._lock:
+            await self._reload()
+    
+    async def get_data(self) -> pd.DataFrame:
+        """Return the current dataset, reloading it if the file changed"""
+        if self.data is None or self._is_stale():
+            async with self._lock:
+                if self.data is None or self._is_stale():
+                    await self._reload()
+        return self.data
+    
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    def _is_stale(self) -> bool:
+        return not self._static and self._current_mtime() != self._mtime
+    
+    async def _reload(self):
+        mtime = self._current_mtime()
+        start = time.perf_counter()
+        data, memory_report = await asyncio.to_thread(self._read, mtime is not None)
+        index = await asyncio.to_thread(CategoryIndex.build, data, CATEGORY_COLUMNS)
+        
+        self.data = data
+        self.index = index
+        self._mtime = mtime
+        self.version += 1
+        self.load_time = time.perf_counter() - start
+        if metrics_registry.enabled:
+            DATASET_LOAD_SECONDS.observe(self.load_time)
+        self.memory_report = memory_report
+    
+    def _read(self, exists: bool) -> Tuple[pd.DataFrame, Dict[str, Dict[str, Any]]]:
+        """Read and normalize the dataset; runs in a worker thread"""
+        try:
+            if exists:
+                data, memory_report = self._read_dataset()
+                logger.info(f"Loaded dataset with {len(data)} records")
+                return data, memory_report
+            logger.warning("Dataset not found, using sample data")
+        except Exception as e:
+            logger.error(f"Error loading data: {e}")
+        return self._normalize(self._create_sample_data())
+    
+    def _read_dataset(self) -> Tuple[pd.DataFrame, Dict[str, Dict[str, Any]]]:
+        """Read the dataset through the columnar cache when possible"""
+        if not settings.DATASET_CACHE_ENABLED:
+            return self._normalize(pd.read_csv(self.path))
+        
+        with open(self.path, 'rb') as f:
+            digest = hashlib.file_digest(f, 'blake2b').hexdigest()[:16]
+        cache_path = Path(settings.DATA_PATH) / f"{self.path.stem}.{digest}.v{CACHE_FORMAT_VERSION}.feather"
+        
+        if cache_path.exists():
+            try:
+                table = feather.read_table(cache_path)
+                memory_report = json.loads((table.schema.metadata or {}).get(MEMORY_REPORT_KEY, b"{}"))
+                return table.to_pandas(), memory_report
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable dataset cache {cache_path}: {e}")
+        
+        data, memory_report = self._normalize(pd.read_csv(self.path))
+        try:
+            self._write_cache(data, memory_report, cache_path)
+        except Exception as e:
+            logger.warning(f"Could not write dataset cache: {e}")
+        return data, memory_report
+    
+    def _write_cache(self, data: pd.DataFrame, memory_report: Dict[str, Dict[str, Any]], cache_path: Path):
+        """Atomically write a new cache file and drop caches of older CSV contents
+        
+        The memory report goes into the file's schema metadata, so loads
+        from the cache still report what the dtype conversion saved.
+        """
+        table = pa.Table.from_pandas(data)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            MEMORY_REPORT_KEY: json.dumps(memory_report).encode()
+        })
+        tmp_path = cache_path.with_suffix('.tmp')
+        feather.write_feather(table, tmp_path)
+        os.replace(tmp_path, cache_path)
+        
+        for stale in cache_path.parent.glob(f"{self.path.stem}.*.feather"):
+            if stale != cache_path:
+                stale.unlink(missing_ok=True)
+        logger.info(f"Wrote dataset cache {cache_path}")
+    
+    def _normalize(self, data: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict[str, Any]]]:
+        """Clean column names and store every column in its most compact dtype"""
+        data.columns = data.columns.str.replace(' ', '.').str.replace('/', '.')
+        return data, optimize_dtypes(data)
+    
+    def _create_sample_data(self) -> pd.DataFrame:
+        """Create sample data for testing"""
+        rng = np.random.RandomState(42)
+        dates = pd.date_range('2023-01-01', '2023-12-31', freq='D')
+        
+        return pd.DataFrame({
+            'Date': rng.choice(dates, 1000),
+            'Country': rng.choice(['USA', 'UK', 'Canada', 'India'], 1000),
+            'Month': rng.choice(['January', 'February', 'March', 'April'], 1000),
+            'Accident.Severity': rng.choice(['Minor', 'Moderate', 'Severe'], 1000, p=[0.5, 0.3, 0.2]),
+            'Weather.Conditions': rng.choice(['Clear', 'Rainy', 'Snowy', 'Foggy'], 1000),
+            'Speed.Limit': rng.randint(30, 120, 1000),
+            'Visibility.Level': rng.uniform(50, 500, 1000),
+            'Driver.Age.Group': rng.choice(['18-25', '26-40', '41-60', '60+'], 1000)
+        })
+
+
+def optimize_dtypes(data: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Convert the columns of ``data`` in place to compact, lossless dtypes
+    
+    Schema columns and low-cardinality strings become categoricals, integers
+    are downcast to the smallest width holding their range, and floats
+    become float32 only when every value survives the round trip exactly.
+    Returns the dtype change and bytes saved for each converted column.
+    """
+    report = {}
+    for col in data.columns:
+        series = data[col]
+        before = series.memory_usage(index=False, deep=True)
+        
+        if series.dtype == object:
+            if col in CATEGORY_COLUMNS or series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+                converted = series.astype('category')
+            else:
+                continue
+        elif pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            converted = pd.to_numeric(series, downcast='integer')
+        elif series.dtype == np.float64:
+            converted = series.astype(np.float32)
+            if not np.array_equal(converted.to_numpy(np.float64), series.to_numpy(), equal_nan=True):
+                continue
+        else:
+            continue
+        
+        if converted.dtype == series.dtype:
+            continue
+        
+        data[col] = converted
+        report[col] = {
+            "dtype_before": str(series.dtype),
+            "dtype_after": str(converted.dtype),
+            "bytes_saved": int(before - converted.memory_usage(index=False, deep=True))
+        }
+    
+    if report:
+        saved = sum(entry["bytes_saved"] for entry in report.values())
+        logger.info(f"Dtype optimization saved {saved / 2**20:.1f} MiB across {len(report)} columns")
+    return report
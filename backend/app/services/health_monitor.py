@@ -0,0 +1,108 @@
+from typing import Dict, Any, Optional
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from app.core.config import settings
+from app.services.ml_service import MLService
+
+logger = logging.getLogger(__name__)
+
+# Readiness fails once the last canary is this many intervals old
+STALE_INTERVALS = 3
+
+class HealthMonitor:
+    """Tiered health probes backed by a periodic canary inference
+    
+    Liveness only shows the event loop is serving requests. Readiness
+    answers from the cached result of ``MLService.canary``, which a
+    background task reruns every ``interval`` seconds and again as soon as
+    a different model version is being served, so probes never touch the
+    model themselves. A deep check running the full prediction path is
+    left to callers that ask for it.
+    """
+    
+    def __init__(self, ml_service: MLService, interval: Optional[float] = None):
+        self.ml_service = ml_service
+        self.interval = settings.HEALTH_CANARY_INTERVAL_SECONDS if interval is None else interval
+        
+        self.status = "unhealthy - not checked yet"
+        self.checked_version: Optional[str] = None
+        self.checked_at: Optional[datetime] = None
+        self.canary_seconds: Optional[float] = None
+        self.checks = 0
+        self.failures = 0
+        self._checked_monotonic: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the background canary loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Stop the background canary loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def check_now(self) -> str:
+        """Run the canary once and cache its result"""
+        version = self.ml_service.model_version
+        start = time.perf_counter()
+        status = await self.ml_service.canary()
+        
+        self.canary_seconds = time.perf_counter() - start
+        self.status = status
+        self.checked_version = version
+        self.checked_at = datetime.now()
+        self._checked_monotonic = time.monotonic()
+        self.checks += 1
+        if status != "healthy":
+            self.failures += 1
+            logger.warning(f"Canary inference unhealthy: {status}")
+        return status
+    
+    def readiness(self) -> str:
+        """Cached ML service status: "healthy" or "unhealthy - <reason>" """
+        if self.ml_service.model_version is None:
+            return "unhealthy - model not loaded"
+        if self.ml_service.model_version != self.checked_version:
+            # A new model was swapped in; keep the last result until it is checked
+            self._wakeup.set()
+        if self._checked_monotonic is None:
+            return self.status
+        if time.monotonic() - self._checked_monotonic > STALE_INTERVALS * self.interval:
+            return "unhealthy - canary result is stale"
+        return self.status
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Last canary result and its history"""
+        return {
+            "status": self.readiness(),
+            "model_version": self.checked_version,
+            "checked_at": self.checked_at,
+            "canary_seconds": self.canary_seconds,
+            "interval_seconds": self.interval,
+            "checks": self.checks,
+            "failures": self.failures
+        }
+    
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                if self.ml_service.model_version is not None:
+                    await self.check_now()
+            except Exception as e:
+                logger.error(f"Health monitor error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
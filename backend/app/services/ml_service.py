@@ -1,10 +1,12 @@
-import joblib
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple, NamedTuple
 import logging
-from pathlib import Path
 import asyncio
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
 import uuid
 
@@ -14,170 +16,356 @@ from sklearn.metrics import accuracy_score, classification_report, confusion_mat
 import xgboost as xgb
 
 from app.core.config import settings
+from app.core.metrics import PREDICTION_BATCH_SIZE, PREDICTION_STAGE_SECONDS, metrics as metrics_registry
+from app.services.dataset_store import DatasetStore
+from app.services.model_registry import ModelRegistry
+from app.services.prediction_cache import PredictionCache
 from app.models.schemas import (
     AccidentPredictionRequest, 
     AccidentPredictionResponse, 
     AccidentSeverity,
-    ModelPerformanceMetrics
+    ModelPerformanceMetrics,
+    ModelVersionInfo,
+    CATEGORICAL_FEATURES,
+    NUMERICAL_FEATURES
 )
 
 logger = logging.getLogger(__name__)
 
+# Boosting rounds per training run; progress is reported per round
+TRAINING_ROUNDS = 100
+
+# Stage histograms, looked up once; keyed by (stage, "single" or "batch")
+STAGE_SECONDS = {
+    (stage, path): PREDICTION_STAGE_SECONDS.labels(stage, path)
+    for stage in ("encode", "risk_factors", "inference", "recommendations")
+    for path in ("single", "batch")
+}
+
+class TrainingCancelled(Exception):
+    """Raised when a training run is cancelled before its model is swapped in"""
+
+class ModelNotReady(RuntimeError):
+    """Raised by predictions made before the first model has been loaded or trained"""
+    
+    def __init__(self, message: str = "No model is loaded yet, training is in progress"):
+        super().__init__(message)
+
+# Fixed request scored by health checks
+HEALTH_CHECK_REQUEST = AccidentPredictionRequest(
+    country="USA",
+    month="January",
+    day_of_week="Monday",
+    time_of_day="Morning",
+    urban_rural="Urban",
+    road_type="Street",
+    road_condition="Dry",
+    speed_limit=50,
+    weather_conditions="Clear",
+    visibility_level=500,
+    number_of_vehicles_involved=2,
+    vehicle_condition="Good",
+    driver_age_group="26-40",
+    driver_gender="Male",
+    driver_alcohol_level=0.0,
+    driver_fatigue=0,
+    pedestrians_involved=0,
+    cyclists_involved=0,
+    traffic_volume=1000,
+    population_density=2000,
+    accident_cause="Human Error"
+)
+
+class InferencePlan(NamedTuple):
+    """One model version and everything derived from it, swapped in as one reference
+    
+    Predictions read ``MLService._plan`` once and use only that snapshot, so a
+    request in flight never pairs a new model with the previous encoders.
+    """
+    
+    version: str
+    model: Any
+    booster: Optional[xgb.Booster]  # Raw booster for the inplace_predict fast path
+    n_features: int
+    categorical: List[Tuple[int, str, Dict[Any, float]]]  # (slot, request field, code table)
+    numerical: List[Tuple[int, str]]  # (slot, request field)
+    severity_labels: Any
+    feature_columns: List[str]
+    feature_encoders: Dict[str, LabelEncoder]
+    metrics: Optional[ModelPerformanceMetrics]
+    trained_at: Optional[datetime]
+
 class MLService:
     """Enhanced ML service for accident severity prediction"""
     
-    def __init__(self):
-        self.model = None
-        self.feature_encoders = {}
-        self.feature_columns = []
-        self.model_version = "1.0.0"
-        self.last_training_time = None
-        self.performance_metrics = None
+    def __init__(self, dataset_store: Optional[DatasetStore] = None):
+        self.dataset_store = dataset_store or DatasetStore()
+        self.registry = ModelRegistry()
+        
+        # The serving model version, see _compile_plan
+        self._plan: Optional[InferencePlan] = None
+        # Recently served versions, kept compiled so rollback is a reference swap
+        self._plans: "OrderedDict[str, InferencePlan]" = OrderedDict()
+        
+        # Repeated payloads reuse earlier outcomes until the model changes
+        self.prediction_cache = PredictionCache()
+        
+        # XGBoost releases the GIL, so inference scales across threads;
+        # training runs in a separate process so it never blocks the event loop
+        self._inference_executor = ThreadPoolExecutor(
+            max_workers=settings.INFERENCE_THREADS,
+            thread_name_prefix="inference"
+        )
+        self._training_executor: Optional[ProcessPoolExecutor] = None
+        
+        # Shared with the training worker: [rounds completed, cancel flag]
+        self._training_signals = None
+        # One training run at a time, so runs never race on the model or its files
+        self._training_lock = asyncio.Lock()
+        # Serializes registry activation with the swap it goes with
+        self._swap_lock = asyncio.Lock()
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether a model is being served; False until the first one is loaded or trained"""
+        return self._plan is not None
+    
+    @property
+    def model(self):
+        return self._plan.model if self._plan is not None else None
+    
+    @property
+    def feature_encoders(self) -> Dict[str, LabelEncoder]:
+        return self._plan.feature_encoders if self._plan is not None else {}
+    
+    @property
+    def feature_columns(self) -> List[str]:
+        return self._plan.feature_columns if self._plan is not None else []
+    
+    @property
+    def model_version(self) -> Optional[str]:
+        return self._plan.version if self._plan is not None else None
+    
+    @property
+    def performance_metrics(self) -> Optional[ModelPerformanceMetrics]:
+        return self._plan.metrics if self._plan is not None else None
+    
+    @property
+    def last_training_time(self) -> Optional[datetime]:
+        return self._plan.trained_at if self._plan is not None else None
+    
+    async def initialize(self) -> bool:
+        """Serve the saved model, if any, without touching the dataset
         
-    async def initialize(self):
-        """Initialize the ML service"""
+        Returns False when no model has been saved yet; the caller decides
+        whether to train one, so startup never waits for training.
+        """
         try:
-            await self.load_model()
-            await self.load_data()
-            logger.info("ML Service initialized successfully")
+            loaded = await asyncio.to_thread(self.load_saved_model)
+            if loaded:
+                logger.info(f"ML Service initialized with model version {self.model_version}")
+            else:
+                logger.info("ML Service initialized without a model, one has to be trained")
+            return loaded
         except Exception as e:
             logger.error(f"Failed to initialize ML service: {e}")
             raise
     
     async def load_model(self):
         """Load the trained model and encoders"""
-        model_path = Path(settings.MODEL_PATH) / "accident_model.joblib"
-        encoders_path = Path(settings.MODEL_PATH) / "encoders.joblib"
-        
-        if model_path.exists() and encoders_path.exists():
-            self.model = joblib.load(model_path)
-            self.feature_encoders = joblib.load(encoders_path)
+        if self.load_saved_model():
             logger.info("Loaded existing model and encoders")
         else:
             logger.info("No existing model found, will train new model")
             await self.train_model()
     
-    async def load_data(self):
-        """Load and preprocess the dataset"""
-        try:
-            data_path = Path("road_accident_dataset.csv")
-            if data_path.exists():
-                self.data = pd.read_csv(data_path)
-                logger.info(f"Loaded dataset with {len(self.data)} records")
-            else:
-                logger.warning("Dataset not found, using sample data")
-                self.data = self._create_sample_data()
-        except Exception as e:
-            logger.error(f"Error loading data: {e}")
-            self.data = self._create_sample_data()
-    
-    def _create_sample_data(self) -> pd.DataFrame:
-        """Create sample data for testing"""
-        # This would be replaced with actual data loading logic
-        return pd.DataFrame({
-            'Country': ['USA', 'UK', 'Canada'] * 100,
-            'Accident.Severity': ['Minor', 'Moderate', 'Severe'] * 100
-        })
+    def load_saved_model(self, version: Optional[str] = None) -> bool:
+        """Load a registry version and serve it; False if none have been saved
+        
+        Defaults to ``settings.MODEL_VERSION``, where "latest" means the
+        registry's active version.
+        """
+        plan = self.load_saved_plan(self.registry, version)
+        if plan is None:
+            return False
+        
+        self._swap(plan)
+        return True
     
-    async def train_model(self):
-        """Train the XGBoost model"""
-        try:
-            logger.info("Starting model training...")
-            
-            # Prepare features and target
-            X, y = self._prepare_training_data()
-            
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
-            )
+    @staticmethod
+    def load_saved_plan(registry: ModelRegistry, version: Optional[str] = None) -> Optional[InferencePlan]:
+        """Load and compile a registry version without serving it; None if none have been saved
+        
+        Scoring workers use this directly, so they never build an MLService.
+        """
+        if version is None and settings.MODEL_VERSION != "latest":
+            version = settings.MODEL_VERSION
+        version = version or registry.active_version()
+        if version is None:
+            return None
+        return MLService._load_plan(registry, version)
+    
+    def list_versions(self) -> List[ModelVersionInfo]:
+        """Registry versions, newest first, flagging the one being served"""
+        return [
+            info.model_copy(update={"active": info.version == self.model_version})
+            for info in self.registry.list_versions()
+        ]
+    
+    async def activate_version(self, version: str):
+        """Serve a stored version, e.g. to roll back; raises ``KeyError`` if unknown
+        
+        Recently served versions are still compiled in memory and swap in
+        instantly; older ones are loaded from the registry first.
+        """
+        async with self._swap_lock:
+            plan = self._plans.get(version)
+            if plan is None:
+                plan = await asyncio.to_thread(self._load_plan, self.registry, version)
+            await asyncio.to_thread(self.registry.activate, version)
+            self._swap(plan)
+        logger.info(f"Now serving model version {version}")
+    
+    @staticmethod
+    def _load_plan(registry: ModelRegistry, version: str) -> InferencePlan:
+        model, encoders, metrics, created_at = registry.load(version)
+        return MLService._compile_plan(version, model, encoders, metrics, created_at)
+    
+    async def train_model(
+        self,
+        on_stage: Optional[Callable[[str], None]] = None,
+        cancel: Optional[asyncio.Event] = None
+    ):
+        """Train the XGBoost model in a worker process and swap it in
+        
+        ``on_stage`` is called with each stage name as training advances.
+        Setting ``cancel`` stops the run at the next boosting round (or
+        stage boundary) and raises ``TrainingCancelled``; once the model is
+        being saved the run can no longer be cancelled.
+        """
+        def stage(name: str):
+            if cancel is not None and cancel.is_set():
+                raise TrainingCancelled()
+            if on_stage is not None:
+                on_stage(name)
+        
+        async with self._training_lock:
+            try:
+                logger.info("Starting model training...")
+                stage("loading_data")
+                
+                data = await self.dataset_store.get_data()
+                
+                # Pickling object columns holds the GIL for seconds, categoricals are cheap
+                data = await asyncio.to_thread(_compact_for_transfer, data)
+                
+                executor = self._get_training_executor()
+                self._training_signals[0] = 0
+                self._training_signals[1] = int(cancel is not None and cancel.is_set())
+                stage("fitting")
+                
+                loop = asyncio.get_running_loop()
+                model, feature_encoders, metrics = await loop.run_in_executor(
+                    executor,
+                    _fit_model,
+                    data,
+                    dict(self.feature_encoders)
+                )
+                
+                logger.info(f"Model trained with accuracy: {metrics.accuracy:.4f}")
+                
+                # Store the new version and make it the registry's active one
+                stage("saving")
+                async with self._swap_lock:
+                    version, created_at, metrics = await asyncio.to_thread(
+                        self.registry.save, model, feature_encoders, metrics
+                    )
+                    plan = await asyncio.to_thread(
+                        self._compile_plan, version, model, feature_encoders, metrics, created_at
+                    )
+                    
+                    # Swap the new model in; predictions only read self._plan
+                    if on_stage is not None:
+                        on_stage("swapping")
+                    self._swap(plan)
             
-            # Train XGBoost model
-            self.model = xgb.XGBClassifier(
-                n_estimators=100,
-                max_depth=6,
-                learning_rate=0.1,
-                subsample=0.8,
-                colsample_bytree=0.8,
-                random_state=42,
-                eval_metric='mlogloss'
+            except TrainingCancelled:
+                logger.info("Model training cancelled")
+                raise
+            except Exception as e:
+                logger.error(f"Error training model: {e}")
+                raise
+    
+    def training_progress(self) -> float:
+        """Fraction of boosting rounds completed by the current training run"""
+        if self._training_signals is None:
+            return 0.0
+        return min(self._training_signals[0] / TRAINING_ROUNDS, 1.0)
+    
+    def cancel_training(self):
+        """Ask the training worker to stop after its current boosting round"""
+        if self._training_signals is not None:
+            self._training_signals[1] = 1
+    
+    def _get_training_executor(self) -> ProcessPoolExecutor:
+        """Lazily start the single training worker process"""
+        if self._training_executor is None:
+            # spawn rather than fork: the parent already runs XGBoost/OpenMP threads
+            context = multiprocessing.get_context("spawn")
+            self._training_signals = context.RawArray('i', 2)
+            self._training_executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_init_training_worker,
+                initargs=(self._training_signals,)
             )
-            
-            self.model.fit(X_train, y_train)
-            
-            # Evaluate model
-            y_pred = self.model.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
-            
-            logger.info(f"Model trained with accuracy: {accuracy:.4f}")
-            
-            # Save model and encoders
-            await self._save_model()
-            
-            # Update performance metrics
-            self.performance_metrics = self._calculate_metrics(y_test, y_pred)
-            self.last_training_time = datetime.now()
-            
-        except Exception as e:
-            logger.error(f"Error training model: {e}")
-            raise
+        return self._training_executor
     
-    def _prepare_training_data(self):
-        """Prepare data for training"""
-        # Clean column names
-        self.data.columns = self.data.columns.str.replace(' ', '.').str.replace('/', '.')
+    @staticmethod
+    def _prepare_training_data(data: pd.DataFrame, feature_encoders: Dict[str, LabelEncoder]):
+        """Prepare data for training
         
+        Fits an encoder into ``feature_encoders`` for every column that has
+        none yet; returns the features, the target and the feature columns.
+        """
         # Define categorical and numerical columns
-        categorical_cols = [
-            'Country', 'Month', 'Day.of.Week', 'Time.of.Day', 'Urban.Rural',
-            'Road.Type', 'Weather.Conditions', 'Driver.Age.Group', 'Driver.Gender',
-            'Vehicle.Condition', 'Road.Condition', 'Accident.Cause'
-        ]
-        
-        numerical_cols = [
-            'Visibility.Level', 'Number.of.Vehicles.Involved', 'Speed.Limit',
-            'Driver.Alcohol.Level', 'Driver.Fatigue', 'Pedestrians.Involved',
-            'Cyclists.Involved', 'Traffic.Volume', 'Population.Density'
-        ]
+        categorical_cols = list(CATEGORICAL_FEATURES)
+        numerical_cols = list(NUMERICAL_FEATURES)
         
         # Prepare features
         X = pd.DataFrame()
         
         # Encode categorical features
         for col in categorical_cols:
-            if col in self.data.columns:
-                if col not in self.feature_encoders:
-                    self.feature_encoders[col] = LabelEncoder()
-                    X[col] = self.feature_encoders[col].fit_transform(self.data[col].astype(str))
+            if col in data.columns:
+                if col not in feature_encoders:
+                    feature_encoders[col] = LabelEncoder()
+                    X[col] = feature_encoders[col].fit_transform(data[col].astype(str))
                 else:
-                    X[col] = self.feature_encoders[col].transform(self.data[col].astype(str))
+                    X[col] = feature_encoders[col].transform(data[col].astype(str))
         
         # Add numerical features
         for col in numerical_cols:
-            if col in self.data.columns:
-                X[col] = pd.to_numeric(self.data[col], errors='coerce').fillna(0)
+            if col in data.columns:
+                X[col] = pd.to_numeric(data[col], errors='coerce').fillna(0)
         
         # Prepare target
-        if 'Accident.Severity' not in self.feature_encoders:
-            self.feature_encoders['Accident.Severity'] = LabelEncoder()
-            y = self.feature_encoders['Accident.Severity'].fit_transform(self.data['Accident.Severity'])
+        if 'Accident.Severity' not in feature_encoders:
+            feature_encoders['Accident.Severity'] = LabelEncoder()
+            y = feature_encoders['Accident.Severity'].fit_transform(data['Accident.Severity'])
         else:
-            y = self.feature_encoders['Accident.Severity'].transform(self.data['Accident.Severity'])
+            y = feature_encoders['Accident.Severity'].transform(data['Accident.Severity'])
         
-        self.feature_columns = X.columns.tolist()
-        return X, y
+        return X, y, X.columns.tolist()
     
-    async def _save_model(self):
-        """Save the trained model and encoders"""
-        model_path = Path(settings.MODEL_PATH) / "accident_model.joblib"
-        encoders_path = Path(settings.MODEL_PATH) / "encoders.joblib"
-        
-        joblib.dump(self.model, model_path)
-        joblib.dump(self.feature_encoders, encoders_path)
-        
-        logger.info("Model and encoders saved successfully")
-    
-    def _calculate_metrics(self, y_true, y_pred) -> ModelPerformanceMetrics:
+    @staticmethod
+    def _calculate_metrics(
+        model,
+        feature_columns: List[str],
+        y_true,
+        y_pred,
+        model_version: str
+    ) -> ModelPerformanceMetrics:
         """Calculate model performance metrics"""
         accuracy = accuracy_score(y_true, y_pred)
         report = classification_report(y_true, y_pred, output_dict=True)
@@ -185,10 +373,10 @@ class MLService:
         
         # Get feature importance
         feature_importance = {}
-        if hasattr(self.model, 'feature_importances_'):
-            for i, importance in enumerate(self.model.feature_importances_):
-                if i < len(self.feature_columns):
-                    feature_importance[self.feature_columns[i]] = float(importance)
+        if hasattr(model, 'feature_importances_'):
+            for i, importance in enumerate(model.feature_importances_):
+                if i < len(feature_columns):
+                    feature_importance[feature_columns[i]] = float(importance)
         
         return ModelPerformanceMetrics(
             accuracy=accuracy,
@@ -197,106 +385,313 @@ class MLService:
             f1_score={k: v['f1-score'] for k, v in report.items() if k.isdigit()},
             confusion_matrix=cm.tolist(),
             feature_importance=feature_importance,
-            model_version=self.model_version,
+            model_version=model_version,
             last_updated=datetime.now()
         )
     
     async def predict(self, request: AccidentPredictionRequest) -> AccidentPredictionResponse:
         """Make a prediction for accident severity"""
         try:
-            # Convert request to feature vector
-            features = self._request_to_features(request)
-            
-            # Make prediction
-            prediction_proba = self.model.predict_proba([features])[0]
-            prediction_class = self.model.predict([features])[0]
-            
-            # Convert back to severity labels
-            severity_labels = self.feature_encoders['Accident.Severity'].classes_
-            predicted_severity = severity_labels[prediction_class]
-            
-            # Create probability dictionary
-            probabilities = {
-                severity_labels[i]: float(prob) 
-                for i, prob in enumerate(prediction_proba)
-            }
-            
-            # Calculate confidence score
-            confidence_score = float(max(prediction_proba))
-            
-            # Generate risk factors and recommendations
-            risk_factors = self._identify_risk_factors(request, features)
-            recommendations = self._generate_recommendations(predicted_severity, risk_factors)
-            
-            return AccidentPredictionResponse(
-                predicted_severity=AccidentSeverity(predicted_severity),
-                confidence_score=confidence_score,
-                probabilities=probabilities,
-                risk_factors=risk_factors,
-                recommendations=recommendations,
-                prediction_id=str(uuid.uuid4()),
-                timestamp=datetime.now(),
-                model_version=self.model_version
-            )
-            
+            self._check_loaded()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._inference_executor, self._predict_one, request)
+        except ModelNotReady:
+            raise
         except Exception as e:
             logger.error(f"Error making prediction: {e}")
             raise
     
-    def _request_to_features(self, request: AccidentPredictionRequest) -> List[float]:
-        """Convert prediction request to feature vector"""
-        features = []
-        
-        # Categorical features
-        categorical_mapping = {
-            'Country': request.country.value,
-            'Month': request.month.value,
-            'Day.of.Week': request.day_of_week.value,
-            'Time.of.Day': request.time_of_day.value,
-            'Urban.Rural': request.urban_rural.value,
-            'Road.Type': request.road_type.value,
-            'Weather.Conditions': request.weather_conditions.value,
-            'Driver.Age.Group': request.driver_age_group.value,
-            'Driver.Gender': request.driver_gender.value,
-            'Vehicle.Condition': request.vehicle_condition.value,
-            'Road.Condition': request.road_condition.value,
-            'Accident.Cause': request.accident_cause.value
+    async def predict_many(self, requests: List[AccidentPredictionRequest]) -> List[AccidentPredictionResponse]:
+        """Make predictions for a batch of requests with a single model call"""
+        try:
+            if not requests:
+                return []
+            self._check_loaded()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._inference_executor, self._predict_batch, requests)
+        except ModelNotReady:
+            raise
+        except Exception as e:
+            logger.error(f"Error making batch prediction: {e}")
+            raise
+    
+    def _check_loaded(self):
+        if self._plan is None:
+            raise ModelNotReady()
+    
+    def _predict_one(self, request: AccidentPredictionRequest) -> AccidentPredictionResponse:
+        """Score a single request; runs on the inference thread pool"""
+        generation = self.prediction_cache.generation
+        plan = self._plan
+        
+        # Convert request to feature vector
+        encode_start = time.perf_counter()
+        features = self._request_to_features(request, plan)
+        encoded = time.perf_counter()
+        risk_factors = self._identify_risk_factors(request, features)
+        if metrics_registry.enabled:
+            STAGE_SECONDS["encode", "single"].observe(encoded - encode_start)
+            STAGE_SECONDS["risk_factors", "single"].observe(time.perf_counter() - encoded)
+        
+        key = self._cache_key(plan, features, risk_factors)
+        cached = self.prediction_cache.get(key)
+        if cached is not None:
+            return self._reissue(cached)
+        
+        start = time.perf_counter()
+        
+        # Make prediction; the class is the argmax of the probabilities
+        prediction_proba = self._predict_proba(plan, features[np.newaxis, :])[0]
+        prediction_class = int(prediction_proba.argmax())
+        inferred = time.perf_counter()
+        
+        response = self._build_response(
+            plan, request, features, prediction_proba, prediction_class, risk_factors
+        )
+        end = time.perf_counter()
+        self.prediction_cache.put(key, response, generation, end - start)
+        if metrics_registry.enabled:
+            STAGE_SECONDS["inference", "single"].observe(inferred - start)
+            STAGE_SECONDS["recommendations", "single"].observe(end - inferred)
+        return response
+    
+    def _predict_batch(self, requests: List[AccidentPredictionRequest]) -> List[AccidentPredictionResponse]:
+        """Score a batch of requests; runs on the inference thread pool"""
+        generation = self.prediction_cache.generation
+        plan = self._plan
+        
+        # Build one 2-D feature matrix for the whole batch
+        encode_start = time.perf_counter()
+        features = self._requests_to_matrix(requests, plan)
+        encoded = time.perf_counter()
+        
+        responses = [None] * len(requests)
+        misses = []
+        for i, request in enumerate(requests):
+            risk_factors = self._identify_risk_factors(request, features[i])
+            key = self._cache_key(plan, features[i], risk_factors)
+            cached = self.prediction_cache.get(key)
+            if cached is not None:
+                responses[i] = self._reissue(cached)
+            else:
+                misses.append((i, key, risk_factors))
+        
+        if metrics_registry.enabled:
+            STAGE_SECONDS["encode", "batch"].observe(encoded - encode_start)
+            # Includes the cache lookups made alongside
+            STAGE_SECONDS["risk_factors", "batch"].observe(time.perf_counter() - encoded)
+        
+        if misses:
+            start = time.perf_counter()
+            
+            # One pass over the trees; the class is the argmax of the probabilities
+            rows = [i for i, _, _ in misses]
+            prediction_proba = self._predict_proba(plan, features[rows])
+            prediction_classes = prediction_proba.argmax(axis=1)
+            inferred = time.perf_counter()
+            
+            for j, (i, key, risk_factors) in enumerate(misses):
+                responses[i] = self._build_response(
+                    plan, requests[i], features[i], prediction_proba[j], prediction_classes[j], risk_factors
+                )
+            
+            end = time.perf_counter()
+            elapsed = (end - start) / len(misses)
+            for i, key, _ in misses:
+                self.prediction_cache.put(key, responses[i], generation, elapsed)
+            if metrics_registry.enabled:
+                # Only rows that reached the model; a batch of cache hits makes no call
+                PREDICTION_BATCH_SIZE.observe(len(misses))
+                STAGE_SECONDS["inference", "batch"].observe(inferred - start)
+                STAGE_SECONDS["recommendations", "batch"].observe(end - inferred)
+        
+        return responses
+    
+    @staticmethod
+    def _cache_key(plan: InferencePlan, features: np.ndarray, risk_factors: List[str]) -> tuple:
+        """Prediction cache key for one encoded request
+        
+        Risk factors are rules over the raw request fields, which the float32
+        feature vector may not pin down exactly (unseen categories all encode
+        to 0), so they are part of the key. The version is the plan the
+        features were encoded with, not whichever one is being served now.
+        """
+        return (plan.version, features.tobytes(), tuple(risk_factors))
+    
+    def _reissue(self, cached: AccidentPredictionResponse) -> AccidentPredictionResponse:
+        """A cached outcome under a fresh prediction ID and timestamp"""
+        return cached.model_copy(update={
+            "prediction_id": str(uuid.uuid4()),
+            "timestamp": datetime.now()
+        })
+    
+    @staticmethod
+    def _predict_proba(plan: InferencePlan, features: np.ndarray) -> np.ndarray:
+        """Class probabilities for a 2-D feature matrix, walking the trees once"""
+        if plan.booster is None:
+            return plan.model.predict_proba(features)
+        
+        # Skip the sklearn wrapper and DMatrix construction
+        proba = plan.booster.inplace_predict(features)
+        if proba.ndim == 1:
+            # Binary objectives only return the positive class probability
+            proba = np.column_stack([1.0 - proba, proba])
+        return proba
+    
+    def _build_response(
+        self,
+        plan: InferencePlan,
+        request: AccidentPredictionRequest,
+        features,
+        prediction_proba,
+        prediction_class: int,
+        risk_factors: Optional[List[str]] = None
+    ) -> AccidentPredictionResponse:
+        """Assemble a prediction response from the model output for one request"""
+        # Convert back to severity labels
+        severity_labels = plan.severity_labels
+        predicted_severity = severity_labels[prediction_class]
+        
+        # Create probability dictionary
+        probabilities = {
+            severity_labels[i]: float(prob) 
+            for i, prob in enumerate(prediction_proba)
         }
         
-        # Encode categorical features
-        for col in self.feature_columns:
-            if col in categorical_mapping:
-                if col in self.feature_encoders:
-                    try:
-                        encoded_value = self.feature_encoders[col].transform([categorical_mapping[col]])[0]
-                        features.append(float(encoded_value))
-                    except ValueError:
-                        # Handle unseen categories
-                        features.append(0.0)
-                else:
-                    features.append(0.0)
-            else:
-                # Numerical features
-                numerical_mapping = {
-                    'Visibility.Level': request.visibility_level,
-                    'Number.of.Vehicles.Involved': request.number_of_vehicles_involved,
-                    'Speed.Limit': request.speed_limit,
-                    'Driver.Alcohol.Level': request.driver_alcohol_level,
-                    'Driver.Fatigue': request.driver_fatigue,
-                    'Pedestrians.Involved': request.pedestrians_involved,
-                    'Cyclists.Involved': request.cyclists_involved,
-                    'Traffic.Volume': request.traffic_volume,
-                    'Population.Density': request.population_density
-                }
-                
-                if col in numerical_mapping:
-                    features.append(float(numerical_mapping[col]))
-                else:
-                    features.append(0.0)
+        # Calculate confidence score
+        confidence_score = float(max(prediction_proba))
         
+        # Generate risk factors and recommendations
+        if risk_factors is None:
+            risk_factors = self._identify_risk_factors(request, features)
+        recommendations = self._generate_recommendations(predicted_severity, risk_factors)
+        
+        return AccidentPredictionResponse(
+            predicted_severity=AccidentSeverity(predicted_severity),
+            confidence_score=confidence_score,
+            probabilities=probabilities,
+            risk_factors=risk_factors,
+            recommendations=recommendations,
+            prediction_id=str(uuid.uuid4()),
+            timestamp=datetime.now(),
+            model_version=plan.version
+        )
+    
+    @staticmethod
+    def _compile_plan(
+        version: str,
+        model,
+        feature_encoders: Dict[str, LabelEncoder],
+        metrics: Optional[ModelPerformanceMetrics],
+        trained_at: Optional[datetime]
+    ) -> InferencePlan:
+        """Bundle a model version with its precompiled hot-path state"""
+        feature_columns = list(model.get_booster().feature_names or [])
+        categorical, numerical = MLService._compile_feature_plan(feature_columns, feature_encoders)
+        return InferencePlan(
+            version=version,
+            model=model,
+            booster=model.get_booster() if settings.INFERENCE_FAST_PATH else None,
+            n_features=len(feature_columns),
+            categorical=categorical,
+            numerical=numerical,
+            severity_labels=feature_encoders['Accident.Severity'].classes_,
+            feature_columns=feature_columns,
+            feature_encoders=feature_encoders,
+            metrics=metrics,
+            trained_at=trained_at
+        )
+    
+    def _swap(self, plan: InferencePlan):
+        """Start serving ``plan`` with a single reference assignment"""
+        self._plan = plan
+        self.prediction_cache.clear()
+        
+        self._plans[plan.version] = plan
+        self._plans.move_to_end(plan.version)
+        while len(self._plans) > max(settings.MODEL_REGISTRY_CACHED, 1):
+            self._plans.popitem(last=False)
+    
+    @staticmethod
+    def _compile_feature_plan(feature_columns: List[str], feature_encoders: Dict[str, LabelEncoder]):
+        """Precompute per-column encoding tables and slots for the current model
+        
+        Each categorical column gets a dict mapping every schema enum member to
+        its encoded value (0 for categories unseen during training), so request
+        encoding becomes plain dict lookups into a preallocated array.
+        """
+        categorical_plan = []
+        numerical_plan = []
+        
+        for slot, col in enumerate(feature_columns):
+            if col in CATEGORICAL_FEATURES:
+                field, enum_cls = CATEGORICAL_FEATURES[col]
+                table = {}
+                if col in feature_encoders:
+                    codes = {
+                        value: float(code)
+                        for code, value in enumerate(feature_encoders[col].classes_)
+                    }
+                    table = {member: codes.get(member.value, 0.0) for member in enum_cls}
+                categorical_plan.append((slot, field, table))
+            elif col in NUMERICAL_FEATURES:
+                numerical_plan.append((slot, NUMERICAL_FEATURES[col]))
+        
+        return categorical_plan, numerical_plan
+    
+    def _encode_into(self, plan: InferencePlan, request: AccidentPredictionRequest, row: np.ndarray):
+        """Encode a request into a preallocated feature row"""
+        for slot, field, table in plan.categorical:
+            row[slot] = table.get(getattr(request, field), 0.0)
+        for slot, field in plan.numerical:
+            row[slot] = getattr(request, field)
+    
+    def _request_to_features(
+        self,
+        request: AccidentPredictionRequest,
+        plan: Optional[InferencePlan] = None
+    ) -> np.ndarray:
+        """Convert prediction request to feature vector"""
+        plan = plan or self._plan
+        features = np.zeros(plan.n_features, dtype=np.float32)
+        self._encode_into(plan, request, features)
+        return features
+    
+    def _requests_to_matrix(
+        self,
+        requests: List[AccidentPredictionRequest],
+        plan: Optional[InferencePlan] = None
+    ) -> np.ndarray:
+        """Convert prediction requests to a 2-D feature matrix"""
+        plan = plan or self._plan
+        features = np.zeros((len(requests), plan.n_features), dtype=np.float32)
+        for row, request in zip(features, requests):
+            self._encode_into(plan, request, row)
         return features
     
-    def _identify_risk_factors(self, request: AccidentPredictionRequest, features: List[float]) -> List[str]:
+    @staticmethod
+    def _frame_to_matrix(frame: pd.DataFrame, plan: InferencePlan) -> np.ndarray:
+        """Encode a DataFrame of request fields into a 2-D feature matrix
+        
+        The columnar counterpart of ``_requests_to_matrix`` for bulk scoring:
+        categoricals go through the same code tables (0 for unknown values)
+        and missing or unparseable numerical values become 0, as in training.
+        """
+        features = np.zeros((len(frame), plan.n_features), dtype=np.float32)
+        for slot, field, table in plan.categorical:
+            codes = {member.value: code for member, code in table.items()}
+            column = frame[field]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                # Translate each category once; code -1 (missing) hits the trailing 0
+                lookup = np.array([codes.get(v, 0.0) for v in column.cat.categories] + [0.0], dtype=np.float32)
+                features[:, slot] = lookup[column.cat.codes.to_numpy()]
+            else:
+                features[:, slot] = column.map(codes).fillna(0.0).to_numpy(np.float32)
+        for slot, field in plan.numerical:
+            features[:, slot] = pd.to_numeric(frame[field], errors='coerce').fillna(0).to_numpy(np.float32)
+        return features
+    
+    def _identify_risk_factors(self, request: AccidentPredictionRequest, features: np.ndarray) -> List[str]:
         """Identify risk factors based on input parameters"""
         risk_factors = []
         
@@ -352,14 +747,29 @@ class MLService:
     
     async def get_performance_metrics(self) -> ModelPerformanceMetrics:
         """Get current model performance metrics"""
-        if self.performance_metrics is None:
-            # Calculate metrics if not available
-            if self.model is not None and hasattr(self, 'data'):
-                X, y = self._prepare_training_data()
-                y_pred = self.model.predict(X)
-                self.performance_metrics = self._calculate_metrics(y, y_pred)
+        plan = self._plan
+        if plan is not None and plan.metrics is None:
+            # Versions imported from before the registry have no stored metrics
+            data = await self.dataset_store.get_data()
+            loop = asyncio.get_running_loop()
+            metrics = await loop.run_in_executor(
+                self._inference_executor, self._evaluate_on_dataset, plan, data
+            )
+            await asyncio.to_thread(self.registry.save_metrics, plan.version, metrics)
+            
+            plan = plan._replace(metrics=metrics)
+            if plan.version in self._plans:
+                self._plans[plan.version] = plan
+            if self._plan is not None and self._plan.version == plan.version:
+                self._plan = plan
         
-        return self.performance_metrics
+        return plan.metrics if plan is not None else None
+    
+    def _evaluate_on_dataset(self, plan: InferencePlan, data: pd.DataFrame) -> ModelPerformanceMetrics:
+        """Score the full dataset with one model version"""
+        X, y, feature_columns = self._prepare_training_data(data, dict(plan.feature_encoders))
+        y_pred = plan.model.predict(X)
+        return self._calculate_metrics(plan.model, feature_columns, y, y_pred, plan.version)
     
     async def health_check(self) -> str:
         """Check ML service health"""
@@ -368,37 +778,108 @@ class MLService:
         
         try:
             # Test prediction with dummy data
-            dummy_request = AccidentPredictionRequest(
-                country="USA",
-                month="January",
-                day_of_week="Monday",
-                time_of_day="Morning",
-                urban_rural="Urban",
-                road_type="Street",
-                road_condition="Dry",
-                speed_limit=50,
-                weather_conditions="Clear",
-                visibility_level=500,
-                number_of_vehicles_involved=2,
-                vehicle_condition="Good",
-                driver_age_group="26-40",
-                driver_gender="Male",
-                driver_alcohol_level=0.0,
-                driver_fatigue=0,
-                pedestrians_involved=0,
-                cyclists_involved=0,
-                traffic_volume=1000,
-                population_density=2000,
-                accident_cause="Human Error"
-            )
-            
-            await self.predict(dummy_request)
+            await self.predict(HEALTH_CHECK_REQUEST)
             return "healthy"
-            
+        
         except Exception as e:
             logger.error(f"Health check failed: {e}")
             return f"unhealthy - {str(e)}"
     
+    async def canary(self) -> str:
+        """Cheap inference probe: the health check request straight through the model
+        
+        Encodes the request with the serving plan and scores it on the
+        inference pool, skipping the prediction cache and response building
+        that ``health_check`` goes through.
+        """
+        plan = self._plan
+        if plan is None:
+            return "unhealthy - model not loaded"
+        
+        try:
+            loop = asyncio.get_running_loop()
+            proba = await loop.run_in_executor(self._inference_executor, self._canary_proba, plan)
+            if not (np.isfinite(proba).all() and abs(float(proba.sum()) - 1.0) < 1e-3):
+                return "unhealthy - model returned invalid probabilities"
+            return "healthy"
+        
+        except Exception as e:
+            logger.error(f"Canary inference failed: {e}")
+            return f"unhealthy - {str(e)}"
+    
+    def _canary_proba(self, plan: InferencePlan) -> np.ndarray:
+        features = self._request_to_features(HEALTH_CHECK_REQUEST, plan)
+        return self._predict_proba(plan, features[np.newaxis, :])[0]
+    
     async def cleanup(self):
         """Cleanup resources"""
-        logger.info("ML Service cleanup completed")
\ No newline at end of file
+        self._inference_executor.shutdown(wait=False, cancel_futures=True)
+        if self._training_executor is not None:
+            self._training_executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("ML Service cleanup completed")
+
+
+def _compact_for_transfer(data: pd.DataFrame) -> pd.DataFrame:
+    """Convert string columns to categoricals before sending the dataset to the training worker"""
+    compact = data.copy(deep=False)
+    for col in compact.columns:
+        if compact[col].dtype == object:
+            compact[col] = compact[col].astype('category')
+    return compact
+
+# Progress/cancel array of the parent MLService, set in the training worker
+_training_signals = None
+
+def _init_training_worker(signals):
+    global _training_signals
+    _training_signals = signals
+
+class _TrainingSignalsCallback(xgb.callback.TrainingCallback):
+    """Publish completed rounds and stop early once cancellation is requested"""
+    
+    def __init__(self, signals):
+        super().__init__()
+        self.signals = signals
+    
+    def after_iteration(self, model, epoch, evals_log) -> bool:
+        self.signals[0] = epoch + 1
+        return bool(self.signals[1])
+
+def _fit_model(data: pd.DataFrame, feature_encoders: Dict[str, LabelEncoder]):
+    """Fit a new model; runs in the training worker process
+    
+    Returns the fitted model, the encoders and the performance metrics on
+    the held-out split; the metrics get their version when the model is saved.
+    """
+    # Prepare features and target
+    X, y, feature_columns = MLService._prepare_training_data(data, feature_encoders)
+    
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    
+    # Train XGBoost model
+    model = xgb.XGBClassifier(
+        n_estimators=TRAINING_ROUNDS,
+        max_depth=6,
+        learning_rate=0.1,
+        subsample=0.8,
+        colsample_bytree=0.8,
+        random_state=42,
+        eval_metric='mlogloss',
+        callbacks=[_TrainingSignalsCallback(_training_signals)] if _training_signals is not None else None
+    )
+    
+    model.fit(X_train, y_train)
+    if _training_signals is not None:
+        # The shared array cannot be pickled back to the parent
+        model.set_params(callbacks=None)
+        if _training_signals[1]:
+            raise TrainingCancelled()
+    
+    # Evaluate model
+    y_pred = model.predict(X_test)
+    metrics = MLService._calculate_metrics(model, feature_columns, y_test, y_pred, model_version="unsaved")
+    
+    return model, feature_encoders, metrics
\ No newline at end of file
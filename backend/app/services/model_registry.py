@@ -0,0 +1,213 @@
+from typing import Dict, List, Any, Optional, Tuple
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import xgboost as xgb
+from sklearn.preprocessing import LabelEncoder
+
+from app.core.config import settings
+from app.models.schemas import ModelPerformanceMetrics, ModelVersionInfo
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+MODEL_FILE = "model.ubj"  # XGBoost's native binary (UBJSON) format
+ENCODERS_FILE = "encoders.json"  # Column -> class labels, in code order
+METRICS_FILE = "metrics.json"
+
+# Pickled files, written before models were stored natively; still readable
+PICKLED_MODEL_FILE = "model.joblib"
+PICKLED_ENCODERS_FILE = "encoders.joblib"
+
+# Files written by releases before the registry, imported as the first version
+LEGACY_MODEL_FILE = "accident_model.joblib"
+LEGACY_ENCODERS_FILE = "encoders.joblib"
+
+class ModelRegistry:
+    """Versioned on-disk store of trained models under ``settings.MODEL_PATH``
+    
+    Every saved model gets its own directory, never modified afterwards::
+        
+        MODEL_PATH/manifest.json
+        MODEL_PATH/v3/model.ubj
+        MODEL_PATH/v3/encoders.json
+        MODEL_PATH/v3/metrics.json
+    
+    Models are stored in XGBoost's native UBJSON format and encoders as a
+    table of class labels, so loading a version unpickles nothing. Versions
+    saved as joblib pickles by earlier releases can still be loaded.
+    
+    A version directory is written under a temporary name and renamed into
+    place, and the manifest (the list of versions and which one is active)
+    is replaced atomically, so a crash mid-save never leaves a half-written
+    model behind. Old inactive versions beyond ``keep`` are pruned.
+    """
+    
+    def __init__(self, root: Optional[str] = None, keep: Optional[int] = None):
+        self.root = Path(root or settings.MODEL_PATH)
+        self.keep = settings.MODEL_REGISTRY_KEEP if keep is None else keep
+        # Reentrant: saves read the manifest, which may import legacy files, under the lock
+        self._lock = threading.RLock()
+    
+    def list_versions(self) -> List[ModelVersionInfo]:
+        """Stored versions, newest first"""
+        manifest = self._read_manifest()
+        return [
+            ModelVersionInfo(**entry, active=entry["version"] == manifest["active"])
+            for entry in reversed(manifest["versions"])
+        ]
+    
+    def active_version(self) -> Optional[str]:
+        """The version to serve, or None if nothing has been saved"""
+        return self._read_manifest()["active"]
+    
+    def save(
+        self,
+        model: Any,
+        encoders: Dict[str, Any],
+        metrics: ModelPerformanceMetrics
+    ) -> Tuple[str, datetime, ModelPerformanceMetrics]:
+        """Store a new version and make it the active one
+        
+        Returns the new version name, its creation time and ``metrics``
+        stamped with that version.
+        """
+        with self._lock:
+            manifest = self._read_manifest()
+            version = f"v{manifest['next']}"
+            created_at = datetime.now()
+            metrics = metrics.model_copy(update={"model_version": version})
+            
+            staging = self.root / f".staging-{uuid.uuid4().hex}"
+            staging.mkdir(parents=True)
+            try:
+                model.save_model(staging / MODEL_FILE)
+                (staging / ENCODERS_FILE).write_text(json.dumps(
+                    {col: encoder.classes_.tolist() for col, encoder in encoders.items()}
+                ))
+                (staging / METRICS_FILE).write_text(metrics.model_dump_json())
+                staging.rename(self.root / version)
+            except Exception:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+            
+            manifest["next"] += 1
+            manifest["active"] = version
+            manifest["versions"].append({
+                "version": version,
+                "created_at": created_at.isoformat(),
+                "accuracy": metrics.accuracy
+            })
+            self._prune(manifest)
+            self._write_manifest(manifest)
+        
+        logger.info(f"Saved model version {version}")
+        return version, created_at, metrics
+    
+    def load(self, version: str) -> Tuple[Any, Dict[str, Any], Optional[ModelPerformanceMetrics], datetime]:
+        """Load a stored version's model, encoders, metrics and creation time
+        
+        Raises ``KeyError`` if the version is not in the registry.
+        """
+        entry = self._entry(self._read_manifest(), version)
+        directory = self.root / version
+        
+        if (directory / MODEL_FILE).exists():
+            model = xgb.XGBClassifier()
+            model.load_model(directory / MODEL_FILE)
+            table = json.loads((directory / ENCODERS_FILE).read_text())
+            encoders = {col: _label_encoder(classes) for col, classes in table.items()}
+        else:
+            model = joblib.load(directory / PICKLED_MODEL_FILE)
+            encoders = joblib.load(directory / PICKLED_ENCODERS_FILE)
+        
+        metrics = None
+        if (directory / METRICS_FILE).exists():
+            metrics = ModelPerformanceMetrics.model_validate_json((directory / METRICS_FILE).read_text())
+        return model, encoders, metrics, datetime.fromisoformat(entry["created_at"])
+    
+    def activate(self, version: str):
+        """Make ``version`` the one served after a restart; raises ``KeyError`` if unknown"""
+        with self._lock:
+            manifest = self._read_manifest()
+            self._entry(manifest, version)
+            manifest["active"] = version
+            self._write_manifest(manifest)
+        logger.info(f"Activated model version {version}")
+    
+    def save_metrics(self, version: str, metrics: ModelPerformanceMetrics):
+        """Record metrics computed after the fact, e.g. for an imported legacy model"""
+        with self._lock:
+            manifest = self._read_manifest()
+            entry = self._entry(manifest, version)
+            (self.root / version / METRICS_FILE).write_text(metrics.model_dump_json())
+            entry["accuracy"] = metrics.accuracy
+            self._write_manifest(manifest)
+    
+    def _entry(self, manifest: Dict[str, Any], version: str) -> Dict[str, Any]:
+        for entry in manifest["versions"]:
+            if entry["version"] == version:
+                return entry
+        raise KeyError(version)
+    
+    def _prune(self, manifest: Dict[str, Any]):
+        """Drop the oldest inactive versions beyond ``keep``"""
+        versions = manifest["versions"]
+        while len(versions) > max(self.keep, 1):
+            oldest = next(entry for entry in versions if entry["version"] != manifest["active"])
+            versions.remove(oldest)
+            shutil.rmtree(self.root / oldest["version"], ignore_errors=True)
+            logger.info(f"Pruned model version {oldest['version']}")
+    
+    def _read_manifest(self) -> Dict[str, Any]:
+        path = self.root / MANIFEST_FILE
+        with self._lock:
+            if path.exists():
+                return json.loads(path.read_text())
+            return self._import_legacy()
+    
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        """Replace the manifest in one rename so readers never see a partial file"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{MANIFEST_FILE}.{uuid.uuid4().hex}"
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, self.root / MANIFEST_FILE)
+    
+    def _import_legacy(self) -> Dict[str, Any]:
+        """Start a manifest, adopting a pre-registry model as ``v1`` if one exists"""
+        manifest = {"active": None, "next": 1, "versions": []}
+        model_path = self.root / LEGACY_MODEL_FILE
+        encoders_path = self.root / LEGACY_ENCODERS_FILE
+        if not (model_path.exists() and encoders_path.exists()):
+            return manifest
+        
+        version = "v1"
+        directory = self.root / version
+        directory.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(model_path, directory / PICKLED_MODEL_FILE)
+        shutil.copy2(encoders_path, directory / PICKLED_ENCODERS_FILE)
+        
+        manifest.update(active=version, next=2)
+        manifest["versions"].append({
+            "version": version,
+            "created_at": datetime.fromtimestamp(model_path.stat().st_mtime).isoformat(),
+            "accuracy": None
+        })
+        self._write_manifest(manifest)
+        logger.info(f"Imported legacy model files as version {version}")
+        return manifest
+
+
+def _label_encoder(classes: List[Any]) -> LabelEncoder:
+    """Rebuild a fitted LabelEncoder from its class labels"""
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(classes, dtype=object)
+    return encoder
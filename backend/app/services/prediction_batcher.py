@@ -0,0 +1,82 @@
+from typing import List, Optional, Tuple
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.models.schemas import AccidentPredictionRequest, AccidentPredictionResponse
+from app.services.ml_service import MLService
+
+logger = logging.getLogger(__name__)
+
+class PredictionBatcher:
+    """Coalesce concurrent single predictions into batched model calls
+    
+    Requests arriving within ``max_wait_ms`` of each other (or until
+    ``max_batch_size`` rows are queued) are scored with one
+    ``MLService.predict_many`` call and each caller's future is resolved
+    with its own response.
+    """
+    
+    def __init__(
+        self,
+        ml_service: MLService,
+        max_wait_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None
+    ):
+        self.ml_service = ml_service
+        self.max_wait = (settings.PREDICTION_BATCH_WINDOW_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.max_batch_size = max_batch_size or settings.PREDICTION_BATCH_MAX_SIZE
+        self._pending: List[Tuple[AccidentPredictionRequest, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+    
+    async def predict(self, request: AccidentPredictionRequest) -> AccidentPredictionResponse:
+        """Queue a request for the next batch and wait for its prediction"""
+        if self.max_batch_size <= 1:
+            return await self.ml_service.predict(request)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        """Start scoring everything queued so far"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, batch: List[Tuple[AccidentPredictionRequest, asyncio.Future]]):
+        """Score one batch and resolve the callers' futures"""
+        try:
+            responses = await self.ml_service.predict_many([request for request, _ in batch])
+        except Exception as e:
+            logger.error(f"Batched prediction failed for {len(batch)} requests: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+    
+    async def close(self):
+        """Flush queued requests and wait for in-flight batches"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Optional
+import threading
+
+from app.core.config import settings
+
+class PredictionCache:
+    """Bounded LRU cache of prediction outcomes, shared by the inference threads
+    
+    Keys are built by the caller from the encoded feature vector and the model
+    version. ``clear`` bumps ``generation``; a ``put`` carrying the generation
+    read before its computation started is dropped if a clear happened in
+    between, so results of a replaced model never re-enter the cache.
+    
+    Every miss records how long the computation took; each hit credits the
+    running mean of those costs to ``time_saved``.
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = settings.PREDICTION_CACHE_SIZE if max_entries is None else max_entries
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.time_saved = 0.0
+        self._miss_time = 0.0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached outcome for ``key``, or None on a miss"""
+        if not self.enabled:
+            return None
+        
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if self.misses:
+                self.time_saved += self._miss_time / self.misses
+            return value
+    
+    def put(self, key: Hashable, value: Any, generation: int, elapsed: float):
+        """Store an outcome computed in ``elapsed`` seconds from a lookup made at ``generation``"""
+        if not self.enabled:
+            return
+        
+        with self._lock:
+            self._miss_time += elapsed
+            if generation != self.generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Invalidate every entry, e.g. after a new model is swapped in"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.invalidations += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit ratio, evictions and the inference time saved by hits"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "time_saved_seconds": self.time_saved,
+                "avg_miss_seconds": self._miss_time / self.misses if self.misses else 0.0
+            }
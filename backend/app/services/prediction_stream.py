@@ -0,0 +1,172 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from functools import partial
+import asyncio
+import logging
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.core.config import settings
+from app.core.encoding import JSON, decode
+from app.models.schemas import AccidentPredictionRequest
+from app.services.bulk_scoring import parse_records
+from app.services.ml_service import MLService
+from app.services.prediction_batcher import PredictionBatcher
+from app.services.websocket_manager import WebSocketManager
+
+logger = logging.getLogger(__name__)
+
+class PredictionStream:
+    """Pipelined prediction protocol for one WebSocket connection
+    
+    A frame is either one request object or an array of them; an
+    optional ``"id"`` on a request is echoed on its reply. Each frame is
+    validated up front and then scored in its own task, so replies go out
+    as soon as they are ready, not in the order they were sent. Single
+    requests go through the shared ``PredictionBatcher`` and are batched
+    with everyone else's; an array frame is scored with one
+    ``predict_many`` call and answered with one ``"predictions"`` frame.
+    
+    At most ``max_in_flight`` frames are being scored or written at once.
+    When the window is full the connection is not read any further, so a
+    client sending faster than it is served is held back by the socket.
+    
+    Text frames are JSON. Binary frames are accepted in the ``encoding``
+    negotiated for the connection, which replies are also sent in.
+    """
+    
+    def __init__(
+        self,
+        websocket: WebSocket,
+        websocket_manager: WebSocketManager,
+        ml_service: MLService,
+        prediction_batcher: PredictionBatcher,
+        max_in_flight: Optional[int] = None,
+        max_batch_items: Optional[int] = None,
+        encoding: str = JSON
+    ):
+        self.websocket = websocket
+        self.websocket_manager = websocket_manager
+        self.ml_service = ml_service
+        self.prediction_batcher = prediction_batcher
+        self.max_in_flight = max_in_flight or settings.WS_MAX_IN_FLIGHT
+        self.max_batch_items = max_batch_items or settings.WS_MAX_BATCH_ITEMS
+        self.encoding = encoding
+        self._window = asyncio.Semaphore(self.max_in_flight)
+        self._tasks = set()
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+    
+    async def run(self):
+        """Read and dispatch frames until the client disconnects or the connection is dropped
+        
+        The manager drops a connection whose sends fail or stall; nothing
+        can be delivered after that, so reading stops and the predictions
+        still in flight are cancelled.
+        """
+        try:
+            while self._connected():
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                frame = message.get("text")
+                await self._dispatch(frame if frame is not None else message["bytes"])
+        except ConnectionError:
+            logger.info("Stopped reading predictions for a dropped WebSocket connection")
+        finally:
+            for task in self._tasks:
+                task.cancel()
+    
+    async def _dispatch(self, frame: Union[str, bytes]):
+        try:
+            data = decode(frame, self.encoding)
+        except ValueError as e:
+            await self._send({"type": "error", "message": f"Invalid frame: {str(e) or type(e).__name__}"})
+            return
+        
+        if isinstance(data, list):
+            if len(data) > self.max_batch_items:
+                await self._send({
+                    "type": "error",
+                    "message": f"Batch size cannot exceed {self.max_batch_items} predictions"
+                })
+                return
+            ids = [item.pop("id", None) if isinstance(item, dict) else None for item in data]
+            requests, rows, errors = parse_records(data, first_row=0)
+            work = partial(self._predict_array, ids, requests, rows, errors)
+        else:
+            request_id = data.pop("id", None) if isinstance(data, dict) else None
+            requests, _, errors = parse_records([data])
+            if errors:
+                await self._send(self._with_id({"type": "error", "message": errors[1]}, request_id))
+                return
+            work = partial(self._predict_one, request_id, requests[0])
+        
+        # Blocks the reader, not the event loop, while the window is full
+        await self._window.acquire()
+        task = asyncio.create_task(self._deliver(work))
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+    
+    def _finished(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        self._window.release()
+    
+    async def _deliver(self, work: Callable[[], Awaitable[None]]):
+        try:
+            await work()
+        except ConnectionError:
+            # The connection was dropped: the other replies cannot be sent either
+            for task in self._tasks:
+                if task is not asyncio.current_task():
+                    task.cancel()
+    
+    def _connected(self) -> bool:
+        return self.websocket_manager.get_connection(self.websocket) is not None
+    
+    async def _predict_one(self, request_id: Any, request: AccidentPredictionRequest):
+        try:
+            prediction = await self.prediction_batcher.predict(request)
+        except Exception as e:
+            await self._send(self._with_id({"type": "error", "message": str(e)}, request_id))
+            return
+        await self._send(self._with_id({"type": "prediction", "data": prediction}, request_id))
+    
+    async def _predict_array(
+        self,
+        ids: List[Any],
+        requests: List[AccidentPredictionRequest],
+        rows: List[int],
+        errors: Dict[int, str]
+    ):
+        results: List[Dict[str, Any]] = [
+            self._with_id({"index": index, "error": message}, ids[index]) for index, message in errors.items()
+        ]
+        try:
+            predictions = await self.ml_service.predict_many(requests)
+        except Exception as e:
+            await self._send({"type": "error", "message": str(e)})
+            return
+        
+        results.extend(
+            self._with_id({"index": index, "data": prediction}, ids[index])
+            for index, prediction in zip(rows, predictions)
+        )
+        results.sort(key=lambda result: result["index"])
+        await self._send({"type": "predictions", "data": results}, predictions=len(predictions))
+    
+    @staticmethod
+    def _with_id(reply: Dict[str, Any], request_id: Any) -> Dict[str, Any]:
+        """Echo the client's correlation ID, if it sent one"""
+        if request_id is not None:
+            reply["id"] = request_id
+        return reply
+    
+    async def _send(self, message: Dict[str, Any], predictions: Optional[int] = None):
+        """Send a reply; raises ``ConnectionError`` once the manager has dropped the connection"""
+        if not self._connected():
+            raise ConnectionError("WebSocket connection was dropped")
+        await self.websocket_manager.send_personal_message(message, self.websocket, predictions=predictions)
+        if not self._connected():
+            raise ConnectionError("WebSocket connection was dropped")
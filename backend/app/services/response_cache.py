@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import hashlib
+import json
+import logging
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """LRU + TTL cache for deterministic endpoint responses
+    
+    Entries live in an in-process ``OrderedDict`` bounded to ``max_entries``
+    (least recently used first out) and expire ``ttl_seconds`` after being
+    stored. When ``settings.RESPONSE_CACHE_REDIS_ENABLED`` is set, or a
+    client is passed in, misses fall through to a shared Redis tier so
+    several workers can reuse each other's results. Any object with async
+    ``get(key)`` and ``set(key, value, px=...)`` methods can stand in for
+    the Redis client.
+    
+    Values must be JSON serializable; callers build keys with ``make_key``.
+    """
+    
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        redis_client: Optional[Any] = None,
+        namespace: str = "response-cache"
+    ):
+        self.max_entries = settings.RESPONSE_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl = settings.RESPONSE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.namespace = namespace
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._redis = redis_client if redis_client is not None else self._connect_redis()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.redis_hits = 0
+        self.redis_errors = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+    
+    def make_key(self, endpoint: str, dataset: str, **params) -> str:
+        """Canonical key for ``endpoint`` called with ``params`` on one dataset version"""
+        canonical = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+        digest = hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+        return f"{self.namespace}:{endpoint}:{dataset}:{digest}"
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key``, or None on a miss"""
+        if not self.enabled:
+            return None
+        
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+        
+        if self._redis is not None:
+            try:
+                payload = await self._redis.get(key)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Response cache Redis lookup failed: {e}")
+                payload = None
+            if payload is not None:
+                value = json.loads(payload)
+                self._store(key, value)
+                self.hits += 1
+                self.redis_hits += 1
+                return value
+        
+        self.misses += 1
+        return None
+    
+    async def set(self, key: str, value: Any):
+        """Cache ``value`` under ``key`` in every tier"""
+        if not self.enabled:
+            return
+        
+        self._store(key, value)
+        if self._redis is not None:
+            try:
+                await self._redis.set(key, json.dumps(value, default=str), px=int(self.ttl * 1000))
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Response cache Redis store failed: {e}")
+    
+    def clear(self):
+        """Drop every in-process entry"""
+        self._entries.clear()
+    
+    async def close(self):
+        """Close the Redis connection, if any"""
+        if self._redis is not None and hasattr(self._redis, 'aclose'):
+            await self._redis.aclose()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "redis_enabled": self._redis is not None,
+            "redis_hits": self.redis_hits,
+            "redis_errors": self.redis_errors
+        }
+    
+    def _store(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    @staticmethod
+    def _connect_redis() -> Optional[Any]:
+        """Create the shared tier's client if it is configured"""
+        if not settings.RESPONSE_CACHE_REDIS_ENABLED:
+            return None
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            logger.warning("RESPONSE_CACHE_REDIS_ENABLED is set but the redis package is not installed")
+            return None
+        return redis.from_url(settings.REDIS_URL)
@@ -0,0 +1,178 @@
+from collections import OrderedDict, deque
+from typing import Dict, List, Any, Optional, Tuple
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+
+from app.models.schemas import TrainingJobState, TrainingJobStatus
+from app.services.ml_service import MLService, TrainingCancelled
+from app.services.websocket_manager import WebSocketManager
+
+logger = logging.getLogger(__name__)
+
+# Progress reported when each stage starts; fitting advances with boosting rounds
+STAGE_PROGRESS = {
+    "loading_data": 0.0,
+    "fitting": 0.05,
+    "saving": 0.9,
+    "swapping": 0.95
+}
+
+FINISHED_STATES = (TrainingJobState.SUCCEEDED, TrainingJobState.FAILED, TrainingJobState.CANCELLED)
+
+class TrainingJobManager:
+    """Run model retraining as tracked, cancellable jobs
+    
+    At most one job is active at a time: submitting while one is queued or
+    running returns that job instead of starting an overlapping training.
+    Jobs call ``MLService.train_model``, which fits in the training worker
+    process and swaps the new model in with a single reference assignment;
+    completed models are announced through ``WebSocketManager.send_model_update``.
+    The last ``max_history`` jobs are kept for status polling.
+    """
+    
+    def __init__(
+        self,
+        ml_service: MLService,
+        websocket_manager: Optional[WebSocketManager] = None,
+        max_history: int = 50
+    ):
+        self.ml_service = ml_service
+        self.websocket_manager = websocket_manager
+        self.max_history = max_history
+        self.jobs: "OrderedDict[str, TrainingJobStatus]" = OrderedDict()
+        self._active: Optional[str] = None
+        self._cancel_events: Dict[str, asyncio.Event] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.completed_runs = 0
+        # Durations of the most recent successful runs
+        self._durations = deque(maxlen=max_history)
+    
+    def submit(self) -> Tuple[TrainingJobStatus, bool]:
+        """Start a training job, or return the active one; the flag tells which"""
+        if self._active is not None:
+            return self.get(self._active), False
+        
+        job = TrainingJobStatus(
+            job_id=str(uuid.uuid4()),
+            state=TrainingJobState.QUEUED,
+            created_at=datetime.now()
+        )
+        self.jobs[job.job_id] = job
+        while len(self.jobs) > self.max_history:
+            self.jobs.popitem(last=False)
+        
+        self._active = job.job_id
+        self._cancel_events[job.job_id] = asyncio.Event()
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job))
+        logger.info(f"Training job {job.job_id} submitted")
+        return job, True
+    
+    def get(self, job_id: str) -> Optional[TrainingJobStatus]:
+        """Current status of a job, with live progress while it is fitting"""
+        job = self.jobs.get(job_id)
+        if job is not None and job.state == TrainingJobState.RUNNING and job.stage == "fitting":
+            fitting = STAGE_PROGRESS["fitting"]
+            job.progress = fitting + (STAGE_PROGRESS["saving"] - fitting) * self.ml_service.training_progress()
+        return job
+    
+    def list_jobs(self) -> List[TrainingJobStatus]:
+        """All retained jobs, newest first"""
+        return [self.get(job_id) for job_id in reversed(self.jobs)]
+    
+    def cancel(self, job_id: str) -> TrainingJobStatus:
+        """Request cancellation of a queued or running job
+        
+        Raises ``KeyError`` for unknown jobs and ``ValueError`` once the job
+        has finished or its model is already being saved.
+        """
+        job = self.jobs[job_id]
+        if job.state in FINISHED_STATES:
+            raise ValueError(f"Job {job_id} already {job.state.value}")
+        if job.stage in ("saving", "swapping"):
+            raise ValueError(f"Job {job_id} is {job.stage} its model and can no longer be cancelled")
+        
+        self._cancel_events[job_id].set()
+        if job.stage == "fitting":
+            self.ml_service.cancel_training()
+        logger.info(f"Cancellation requested for training job {job_id}")
+        return job
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Job counts per state and training durations"""
+        counts = {state.value: 0 for state in TrainingJobState}
+        for job in self.jobs.values():
+            counts[job.state.value] += 1
+        
+        durations = self._durations
+        return {
+            "active_job": self._active,
+            "jobs": counts,
+            "completed_runs": self.completed_runs,
+            "last_duration_seconds": durations[-1] if durations else None,
+            "avg_duration_seconds": sum(durations) / len(durations) if durations else None,
+            "max_duration_seconds": max(durations) if durations else None
+        }
+    
+    async def close(self):
+        """Cancel the active job and wait for it to stop"""
+        if self._active is None:
+            return
+        task = self._tasks.get(self._active)
+        try:
+            self.cancel(self._active)
+        except ValueError:
+            pass
+        if task is not None:
+            try:
+                await asyncio.wait_for(task, timeout=10)
+            except asyncio.TimeoutError:
+                logger.warning("Training job did not stop in time")
+    
+    async def _run(self, job: TrainingJobStatus):
+        def on_stage(stage: str):
+            job.stage = stage
+            job.progress = STAGE_PROGRESS[stage]
+        
+        job.state = TrainingJobState.RUNNING
+        job.started_at = datetime.now()
+        try:
+            await self.ml_service.train_model(on_stage=on_stage, cancel=self._cancel_events[job.job_id])
+            job.state = TrainingJobState.SUCCEEDED
+            job.progress = 1.0
+            job.metrics = self.ml_service.performance_metrics
+        except TrainingCancelled:
+            job.state = TrainingJobState.CANCELLED
+        except Exception as e:
+            job.state = TrainingJobState.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now()
+            job.duration_seconds = (job.finished_at - job.started_at).total_seconds()
+            self._active = None
+            self._cancel_events.pop(job.job_id, None)
+            self._tasks.pop(job.job_id, None)
+            logger.info(
+                f"Training job {job.job_id} {job.state.value} after {job.duration_seconds:.1f}s"
+            )
+        
+        if job.state == TrainingJobState.SUCCEEDED:
+            self.completed_runs += 1
+            self._durations.append(job.duration_seconds)
+            await self._announce(job)
+    
+    async def _announce(self, job: TrainingJobStatus):
+        """Tell connected clients that a new model is serving"""
+        if self.websocket_manager is None:
+            return
+        try:
+            await self.websocket_manager.send_model_update({
+                "job_id": job.job_id,
+                "model_version": self.ml_service.model_version,
+                "accuracy": job.metrics.accuracy if job.metrics else None,
+                "trained_at": job.finished_at.isoformat(),
+                "duration_seconds": job.duration_seconds
+            })
+        except Exception as e:
+            logger.error(f"Error announcing model update: {e}")
@@ -1,66 +1,336 @@
-from typing import List, Dict, Any
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Any, Optional, Union
 from fastapi import WebSocket
-import json
 import logging
 import asyncio
+import uuid
+
+from app.core.config import settings
+from app.core.encoding import JSON, encode, encode_text
 
 logger = logging.getLogger(__name__)
 
+@dataclass(slots=True)
+class FanoutStats:
+    """Running frame totals across all connections, so stats never scan them"""
+    
+    queued: int = 0
+    sent: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+
+class _Outbox:
+    """Bounded queue of outgoing frames for one connection, drained by its own writer task
+    
+    Broadcast frames are offered without waiting: a frame with a coalesce
+    key replaces a still-queued frame with the same key, and when the queue
+    is full the oldest broadcast frame is dropped. Personal messages are
+    never dropped; their senders wait until the frame has been written.
+    Text payloads go out as text frames and bytes as binary frames.
+    A failed send ends the writer and reports the connection through
+    ``on_failure``; so does ``expire`` once a send has been stuck for longer
+    than ``send_timeout``. The manager then drops and closes the connection.
+    """
+    
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_size: int,
+        send_timeout: float,
+        on_failure: Callable[[WebSocket], None],
+        stats: FanoutStats
+    ):
+        self.websocket = websocket
+        self.max_size = max_size
+        self.send_timeout = send_timeout
+        self._on_failure = on_failure
+        # Entries are [payload, coalesce key, future of a personal message]
+        self._entries: deque = deque()
+        self._keyed: Dict[str, list] = {}
+        self._ready = asyncio.Event()
+        self._closed = False
+        # Loop time the in-flight send started, checked by the manager's watchdog
+        self._sending_since: Optional[float] = None
+        self._current: Optional[list] = None
+        
+        self.stats = stats
+        self._task = asyncio.create_task(self._write())
+    
+    def offer(self, payload: Union[str, bytes], key: Optional[str] = None) -> bool:
+        """Queue a broadcast frame; False if it was dropped"""
+        if self._closed:
+            return False
+        
+        if key is not None and key in self._keyed:
+            self._keyed[key][0] = payload
+            self.stats.coalesced += 1
+            return True
+        
+        if len(self._entries) >= self.max_size:
+            oldest = next((entry for entry in self._entries if entry[2] is None), None)
+            if oldest is None:
+                self.stats.dropped += 1
+                return False
+            self._entries.remove(oldest)
+            self._forget(oldest)
+            self.stats.dropped += 1
+            self.stats.queued -= 1
+        
+        entry = [payload, key, None]
+        self._entries.append(entry)
+        self.stats.queued += 1
+        if key is not None:
+            self._keyed[key] = entry
+        self._ready.set()
+        return True
+    
+    async def send(self, payload: Union[str, bytes]):
+        """Queue a personal message and wait until it has been written"""
+        if self._closed:
+            raise ConnectionError("WebSocket connection is closed")
+        future = asyncio.get_running_loop().create_future()
+        self._entries.append([payload, None, future])
+        self.stats.queued += 1
+        self._ready.set()
+        await future
+    
+    @property
+    def queued(self) -> int:
+        return len(self._entries)
+    
+    def expire(self, now: float) -> bool:
+        """Fail the connection if its current send started over ``send_timeout`` ago"""
+        if self._sending_since is None or now - self._sending_since <= self.send_timeout:
+            return False
+        logger.error(f"WebSocket send timed out after {self.send_timeout}s")
+        self._on_failure(self.websocket)
+        return True
+    
+    def close(self):
+        """Stop the writer and fail any personal messages still queued or in flight"""
+        self._closed = True
+        self._task.cancel()
+        pending = list(self._entries)
+        if self._current is not None:
+            pending.append(self._current)
+        for _, _, future in pending:
+            if future is not None and not future.done():
+                future.set_exception(ConnectionError("WebSocket connection is closed"))
+        self.stats.queued -= len(self._entries)
+        self._entries.clear()
+        self._keyed.clear()
+    
+    def _forget(self, entry: list):
+        if entry[1] is not None and self._keyed.get(entry[1]) is entry:
+            del self._keyed[entry[1]]
+    
+    async def _write(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            while not self._entries:
+                self._ready.clear()
+                await self._ready.wait()
+            
+            entry = self._entries.popleft()
+            self.stats.queued -= 1
+            self._forget(entry)
+            payload, _, future = entry
+            # No per-send timer: the manager's watchdog expires sends that hang
+            self._current = entry
+            self._sending_since = loop.time()
+            try:
+                if isinstance(payload, bytes):
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+            except Exception as e:
+                logger.error(f"Error sending WebSocket message: {e}")
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                self._on_failure(self.websocket)
+                return
+            
+            self._current = None
+            self._sending_since = None
+            self.stats.sent += 1
+            if future is not None and not future.done():
+                future.set_result(None)
+
+
+@dataclass(slots=True)
+class Connection:
+    """Registry record of one WebSocket connection"""
+    
+    connection_id: str
+    websocket: WebSocket
+    outbox: _Outbox
+    connected_at: float
+    encoding: str = JSON
+    predictions_count: int = 0
+
 class WebSocketManager:
-    """WebSocket connection manager for real-time communication"""
-    
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.connection_data: Dict[WebSocket, Dict[str, Any]] = {}
-    
-    async def connect(self, websocket: WebSocket):
-        """Accept a new WebSocket connection"""
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        self.connection_data[websocket] = {
-            "connected_at": asyncio.get_event_loop().time(),
-            "predictions_count": 0
-        }
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
+    """WebSocket connection manager for real-time communication
+    
+    Every connection gets an ``_Outbox`` with its own writer task, so a
+    broadcast serializes the message once and only enqueues it per
+    connection; a slow client falls behind (losing or coalescing broadcast
+    frames) or is disconnected after a send timeout without delaying anyone
+    else. One watchdog task enforces the timeout for all connections, so
+    sends carry no timer of their own.
+    
+    Connections are registered by ID in a dict, with a second dict from
+    socket to record, so connecting and disconnecting are O(1) however many
+    clients drop at once. Totals are kept as running aggregates.
+    """
+    
+    def __init__(self, outbox_size: Optional[int] = None, send_timeout: Optional[float] = None):
+        self.connections: Dict[str, Connection] = {}
+        self._by_socket: Dict[WebSocket, Connection] = {}
+        self.outbox_size = settings.WS_OUTBOX_SIZE if outbox_size is None else outbox_size
+        self.send_timeout = settings.WS_SEND_TIMEOUT_SECONDS if send_timeout is None else send_timeout
+        self.stats = FanoutStats()
+        self.broadcasts = 0
+        self.timeouts = 0
+        self.total_connections = 0
+        # Predictions sent to the currently connected clients
+        self.total_predictions = 0
+        self._watchdog: Optional[asyncio.Task] = None
+        self._closing = set()
+    
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self._by_socket)
+    
+    def get_connection(self, websocket: WebSocket) -> Optional[Connection]:
+        return self._by_socket.get(websocket)
+    
+    async def connect(self, websocket: WebSocket, subprotocol: Optional[str] = None) -> str:
+        """Accept a new WebSocket connection and return its ID
+        
+        ``subprotocol`` is the encoding negotiated with the client (see
+        ``app.core.encoding``); the connection's messages are sent in it.
+        """
+        if subprotocol is None:
+            await websocket.accept()
+        else:
+            await websocket.accept(subprotocol=subprotocol)
+        if self._watchdog is None:
+            self._watchdog = asyncio.create_task(self._expire_stuck_sends())
+        
+        connection = Connection(
+            connection_id=uuid.uuid4().hex,
+            websocket=websocket,
+            outbox=_Outbox(websocket, self.outbox_size, self.send_timeout, self._fail, self.stats),
+            connected_at=asyncio.get_event_loop().time(),
+            encoding=subprotocol or JSON
+        )
+        self.connections[connection.connection_id] = connection
+        self._by_socket[websocket] = connection
+        self.total_connections += 1
+        logger.info(f"WebSocket connected. Total connections: {len(self.connections)}")
+        return connection.connection_id
     
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            if websocket in self.connection_data:
-                del self.connection_data[websocket]
-            logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
-    
-    async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
-        """Send a message to a specific WebSocket connection"""
+        connection = self._by_socket.pop(websocket, None)
+        if connection is None:
+            return
+        del self.connections[connection.connection_id]
+        self.total_predictions -= connection.predictions_count
+        connection.outbox.close()
+        logger.info(f"WebSocket disconnected. Total connections: {len(self.connections)}")
+    
+    def _fail(self, websocket: WebSocket):
+        """Drop a connection whose send failed or timed out and close its socket
+        
+        Closing ends the endpoint's receive loop, so the client notices
+        instead of having its later requests silently dropped.
+        """
+        if websocket not in self._by_socket:
+            return
+        self.disconnect(websocket)
+        task = asyncio.create_task(self._close_socket(websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    async def _close_socket(self, websocket: WebSocket):
+        try:
+            # A stalled client may not take the close frame either
+            await asyncio.wait_for(websocket.close(code=1011), timeout=self.send_timeout)
+        except Exception as e:
+            logger.warning(f"Could not close failed WebSocket: {e!r}")
+    
+    async def close(self):
+        """Stop the watchdog and drop every connection"""
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        for websocket in list(self._by_socket):
+            self.disconnect(websocket)
+    
+    async def _expire_stuck_sends(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.send_timeout / 2)
+            now = loop.time()
+            self.timeouts += sum(
+                connection.outbox.expire(now) for connection in list(self.connections.values())
+            )
+    
+    async def send_personal_message(
+        self,
+        message: Dict[str, Any],
+        websocket: WebSocket,
+        predictions: Optional[int] = None
+    ):
+        """Send a message to a specific WebSocket connection
+        
+        ``predictions`` is how many predictions the message carries; by
+        default one for a ``"prediction"`` message and none otherwise.
+        """
+        if predictions is None:
+            predictions = 1 if message.get("type") == "prediction" else 0
         try:
-            await websocket.send_text(json.dumps(message))
+            connection = self._by_socket.get(websocket)
+            if connection is None:
+                raise ConnectionError("WebSocket is not connected")
+            await connection.outbox.send(self._frame(message, connection.encoding))
             
-            # Update connection stats
-            if websocket in self.connection_data:
-                if message.get("type") == "prediction":
-                    self.connection_data[websocket]["predictions_count"] += 1
-                    
+            # Update connection stats, unless it disconnected meanwhile
+            if predictions and self._by_socket.get(websocket) is connection:
+                connection.predictions_count += predictions
+                self.total_predictions += predictions
+        
         except Exception as e:
             logger.error(f"Error sending WebSocket message: {e}")
             self.disconnect(websocket)
     
-    async def broadcast(self, message: Dict[str, Any]):
-        """Broadcast a message to all connected WebSocket clients"""
-        if not self.active_connections:
-            return
+    async def broadcast(self, message: Dict[str, Any], coalesce_key: Optional[str] = None) -> int:
+        """Broadcast a message to all connected WebSocket clients
         
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(json.dumps(message))
-            except Exception as e:
-                logger.error(f"Error broadcasting to WebSocket: {e}")
-                disconnected.append(connection)
+        The message is serialized once per encoding in use and queued on
+        every connection; returns how many connections accepted it. A queued message with the
+        same ``coalesce_key`` is replaced rather than followed.
+        """
+        if not self.connections:
+            return 0
         
-        # Clean up disconnected connections
-        for connection in disconnected:
-            self.disconnect(connection)
+        payloads = {}
+        accepted = 0
+        self.broadcasts += 1
+        # offer never disconnects, so the registry cannot change while iterating
+        for connection in self.connections.values():
+            payload = payloads.get(connection.encoding)
+            if payload is None:
+                payload = payloads[connection.encoding] = self._frame(message, connection.encoding)
+            accepted += connection.outbox.offer(payload, coalesce_key)
+        return accepted
+    
+    @staticmethod
+    def _frame(message: Dict[str, Any], encoding: str) -> Union[str, bytes]:
+        """JSON goes out in text frames, other encodings in binary frames"""
+        return encode_text(message) if encoding == JSON else encode(message, encoding)
     
     async def send_system_status(self, status: Dict[str, Any]):
         """Send system status update to all connections"""
@@ -69,7 +339,8 @@ class WebSocketManager:
             "data": status,
             "timestamp": asyncio.get_event_loop().time()
         }
-        await self.broadcast(message)
+        # Only the latest status matters to a client that is behind
+        await self.broadcast(message, coalesce_key="system_status")
     
     async def send_model_update(self, model_info: Dict[str, Any]):
         """Send model update notification to all connections"""
@@ -78,23 +349,33 @@ class WebSocketManager:
             "data": model_info,
             "timestamp": asyncio.get_event_loop().time()
         }
-        await self.broadcast(message)
+        await self.broadcast(message, coalesce_key="model_update")
     
-    def get_connection_stats(self) -> Dict[str, Any]:
-        """Get statistics about active connections"""
-        total_predictions = sum(
-            data.get("predictions_count", 0) 
-            for data in self.connection_data.values()
-        )
+    def get_connection_stats(self, detail: bool = True) -> Dict[str, Any]:
+        """Get statistics about active connections
         
-        return {
-            "active_connections": len(self.active_connections),
-            "total_predictions": total_predictions,
-            "connections_data": [
+        Totals come from running aggregates; ``detail`` adds one entry per
+        connection, which is the only part that grows with the client count.
+        """
+        stats = {
+            "active_connections": len(self.connections),
+            "total_connections": self.total_connections,
+            "total_predictions": self.total_predictions,
+            "broadcasts": self.broadcasts,
+            "send_timeouts": self.timeouts,
+            "queued_messages": self.stats.queued,
+            "sent_messages": self.stats.sent,
+            "dropped_messages": self.stats.dropped,
+            "coalesced_messages": self.stats.coalesced
+        }
+        if detail:
+            stats["connections_data"] = [
                 {
-                    "connected_at": data["connected_at"],
-                    "predictions_count": data["predictions_count"]
+                    "connection_id": connection.connection_id,
+                    "connected_at": connection.connected_at,
+                    "encoding": connection.encoding,
+                    "predictions_count": connection.predictions_count
                 }
-                for data in self.connection_data.values()
+                for connection in self.connections.values()
             ]
-        }
\ No newline at end of file
+        return stats
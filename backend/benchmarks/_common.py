@@ -0,0 +1,146 @@
+"""Shared helpers for the backend benchmarks.
+
+Run benchmarks from the ``backend`` directory, e.g.::
+
+    python -m benchmarks.bench_batch_predict
+"""
+import os
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+# Keep benchmark models away from the real models/ directory
+os.environ.setdefault("MODEL_PATH", tempfile.mkdtemp(prefix="bench-models-"))
+
+import numpy as np
+import pandas as pd
+
+from app.models.schemas import (
+    CATEGORICAL_FEATURES,
+    AccidentCause,
+    AccidentPredictionRequest,
+    AccidentSeverity,
+    Country,
+    DayOfWeek,
+    DriverAgeGroup,
+    DriverGender,
+    Month,
+    RoadCondition,
+    RoadType,
+    TimeOfDay,
+    UrbanRural,
+    VehicleCondition,
+    WeatherConditions,
+)
+from app.services.dataset_store import DatasetStore
+from app.services.ml_service import MLService
+from app.services.prediction_cache import PredictionCache
+
+
+def make_dataset(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Create a synthetic dataset with the same columns as road_accident_dataset.csv"""
+    rng = np.random.default_rng(seed)
+    data = {
+        col: rng.choice([member.value for member in enum], rows)
+        for col, (_, enum) in CATEGORICAL_FEATURES.items()
+    }
+    data.update({
+        'Visibility.Level': rng.uniform(50, 500, rows).round(1),
+        'Number.of.Vehicles.Involved': rng.integers(1, 6, rows),
+        'Speed.Limit': rng.integers(30, 120, rows),
+        'Driver.Alcohol.Level': rng.uniform(0, 0.25, rows).round(3),
+        'Driver.Fatigue': rng.integers(0, 2, rows),
+        'Pedestrians.Involved': rng.integers(0, 3, rows),
+        'Cyclists.Involved': rng.integers(0, 3, rows),
+        'Traffic.Volume': rng.integers(100, 10000, rows),
+        'Population.Density': rng.integers(10, 5000, rows),
+        'Accident.Severity': rng.choice([s.value for s in AccidentSeverity], rows, p=[0.5, 0.3, 0.2]),
+    })
+    return pd.DataFrame(data)
+
+
+def make_compact_dataset(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Like make_dataset, but built directly in compact dtypes for very large row counts"""
+    rng = np.random.default_rng(seed)
+    data = {
+        col: pd.Categorical.from_codes(
+            rng.integers(0, len(enum), rows, dtype=np.int8),
+            categories=sorted(member.value for member in enum)
+        )
+        for col, (_, enum) in CATEGORICAL_FEATURES.items()
+    }
+    data.update({
+        'Speed.Limit': rng.integers(30, 120, rows, dtype=np.int8),
+        'Visibility.Level': rng.uniform(50, 500, rows).astype(np.float32),
+        'Accident.Severity': pd.Categorical.from_codes(
+            rng.choice(3, rows, p=[0.5, 0.3, 0.2]).astype(np.int8),
+            categories=[s.value for s in AccidentSeverity]
+        ),
+    })
+    return pd.DataFrame(data)
+
+
+def make_requests(count: int, seed: int = 7) -> List[AccidentPredictionRequest]:
+    """Create random, valid prediction requests"""
+    rng = np.random.default_rng(seed)
+    fields = {
+        'country': Country, 'month': Month, 'day_of_week': DayOfWeek,
+        'time_of_day': TimeOfDay, 'urban_rural': UrbanRural, 'road_type': RoadType,
+        'road_condition': RoadCondition, 'weather_conditions': WeatherConditions,
+        'vehicle_condition': VehicleCondition, 'driver_age_group': DriverAgeGroup,
+        'driver_gender': DriverGender, 'accident_cause': AccidentCause,
+    }
+    requests = []
+    for _ in range(count):
+        payload = {name: list(enum)[rng.integers(len(enum))] for name, enum in fields.items()}
+        payload.update(
+            speed_limit=int(rng.integers(30, 120)),
+            visibility_level=float(rng.uniform(50, 500)),
+            number_of_vehicles_involved=int(rng.integers(1, 6)),
+            driver_alcohol_level=float(rng.uniform(0, 0.25)),
+            driver_fatigue=int(rng.integers(0, 2)),
+            pedestrians_involved=int(rng.integers(0, 3)),
+            cyclists_involved=int(rng.integers(0, 3)),
+            traffic_volume=int(rng.integers(100, 10000)),
+            population_density=int(rng.integers(10, 5000)),
+        )
+        requests.append(AccidentPredictionRequest(**payload))
+    return requests
+
+
+async def trained_service(rows: int = 5000, cache_size: int = 0) -> MLService:
+    """Return an MLService trained on a synthetic dataset
+
+    The prediction cache is off unless ``cache_size`` is given, so repeated
+    calls keep measuring inference.
+    """
+    service = MLService(DatasetStore.from_frame(make_dataset(rows)))
+    service.prediction_cache = PredictionCache(cache_size)
+    await service.train_model()
+    return service
+
+
+def timeit(fn: Callable[[], object], repeat: int = 5) -> float:
+    """Return the best wall-clock time of ``repeat`` runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def atimeit(fn: Callable[[], Awaitable[object]], repeat: int = 5) -> float:
+    """Async variant of :func:`timeit`"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Return p50/p99 of latency samples in microseconds"""
+    arr = np.asarray(samples) * 1e6
+    return {'p50_us': float(np.percentile(arr, 50)), 'p99_us': float(np.percentile(arr, 99))}
@@ -0,0 +1,30 @@
+"""Analytics endpoint latency: first call per dataset version versus cached aggregates."""
+import asyncio
+
+from app.services.analytics_service import AnalyticsService
+from app.services.dataset_store import DatasetStore
+from benchmarks._common import atimeit, make_dataset
+
+
+async def main():
+    for rows in (10_000, 100_000, 1_000_000):
+        store = DatasetStore.from_frame(DatasetStore()._normalize(make_dataset(rows))[0])
+        service = AnalyticsService(store)
+
+        async def cold():
+            store.version += 1  # what a dataset reload does
+            await service.get_geographical_analysis()
+
+        cold_s = await atimeit(cold, repeat=3)
+        for name, endpoint in (
+            ('trends', service.get_accident_trends),
+            ('risk-factors', service.analyze_risk_factors),
+            ('geographical', service.get_geographical_analysis),
+        ):
+            warm_s = await atimeit(endpoint, repeat=200)
+            print(f"rows={rows:8d}  {name:13s} warm={warm_s * 1e6:8.1f} us")
+        print(f"rows={rows:8d}  aggregate rebuild={cold_s * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""Aggregate computation time versus row count: per-group scans against single-pass counts.
+
+"legacy" is the previous geographical/risk-factor code: a groupby with a
+Python lambda plus one boolean scan per (country, severity) and per
+weather condition.
+"""
+import asyncio
+import time
+
+import pandas as pd
+
+from app.services.analytics_service import AnalyticsService, _severity_counts
+from app.services.dataset_store import DatasetStore
+from benchmarks._common import make_compact_dataset
+
+
+def legacy_aggregates(data: pd.DataFrame):
+    country_stats = data.groupby('Country', observed=True).agg({
+        'Accident.Severity': ['count', lambda x: (x == 'Severe').sum()]
+    })
+    for country in country_stats.index:
+        for severity in ('Minor', 'Moderate'):
+            data[(data['Country'] == country) & (data['Accident.Severity'] == severity)].shape[0]
+    for weather in data['Weather.Conditions'].unique():
+        data[data['Weather.Conditions'] == weather].shape[0]
+
+
+def single_pass_aggregates(data: pd.DataFrame):
+    _severity_counts(data, 'Country')
+    data['Weather.Conditions'].value_counts()
+
+
+def _time(fn, data):
+    start = time.perf_counter()
+    fn(data)
+    return time.perf_counter() - start
+
+
+async def main():
+    for rows in (10_000, 1_000_000, 10_000_000):
+        data = make_compact_dataset(rows)
+        service = AnalyticsService(DatasetStore.from_frame(data))
+
+        legacy_s = _time(legacy_aggregates, data)
+        single_s = _time(single_pass_aggregates, data)
+        all_s = _time(lambda d: service._compute_aggregates(d, 1), data)
+        print(
+            f"rows={rows:9d}  legacy={legacy_s * 1000:9.1f} ms  single-pass={single_s * 1000:8.1f} ms  "
+            f"({legacy_s / single_s:5.1f}x)  all aggregates={all_s * 1000:8.1f} ms"
+        )
+        del data, service
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,26 @@
+"""Compare the per-row prediction loop with the vectorized predict_many path."""
+import asyncio
+
+from benchmarks._common import atimeit, make_requests, trained_service
+
+
+async def main():
+    service = await trained_service()
+
+    for size in (1, 10, 100, 1000):
+        requests = make_requests(size)
+
+        async def per_row():
+            return [await service.predict(r) for r in requests]
+
+        loop_s = await atimeit(per_row, repeat=3)
+        vectorized_s = await atimeit(lambda: service.predict_many(requests), repeat=3)
+        print(
+            f"batch={size:5d}  loop={loop_s * 1000:9.2f} ms  "
+            f"predict_many={vectorized_s * 1000:8.2f} ms  "
+            f"speedup={loop_s / vectorized_s:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
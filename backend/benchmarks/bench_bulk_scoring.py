@@ -0,0 +1,76 @@
+"""Streaming bulk scoring versus one whole-body batch: throughput and peak memory.
+
+"whole body" mirrors /predict/batch without its 1000-row cap: every record
+is parsed into a request model, scored in one call and serialized as one
+JSON document. "streamed" runs the /predict/stream pipeline on the same
+NDJSON upload. Peak memory is traced in a separate run from the timing.
+"""
+import asyncio
+import json
+import tempfile
+import time
+import tracemalloc
+
+from app.models.schemas import AccidentPredictionRequest
+from app.services.bulk_scoring import BulkScorer
+from benchmarks._common import make_requests, trained_service
+
+
+def write_upload(requests, copies):
+    upload = tempfile.TemporaryFile()
+    lines = "".join(request.model_dump_json() + "\n" for request in requests).encode()
+    for _ in range(copies):
+        upload.write(lines)
+    return upload
+
+
+async def whole_body(service, upload):
+    upload.seek(0)
+    records = [json.loads(line) for line in upload.read().splitlines()]
+    requests = [AccidentPredictionRequest(**record) for record in records]
+    predictions = await service.predict_many(requests)
+    return json.dumps({"predictions": [p.model_dump(mode='json') for p in predictions]})
+
+
+async def streamed(service, upload):
+    upload.seek(0)
+    scorer = BulkScorer(service)
+    # stream() closes its upload, so hand it a view of the shared file
+    view = open(upload.fileno(), 'rb', closefd=False)
+    size = 0
+    async for chunk in scorer.stream(view, 'ndjson'):
+        size += len(chunk)
+    return size
+
+
+async def measure(fn, service, upload):
+    start = time.perf_counter()
+    await fn(service, upload)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    await fn(service, upload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+async def main():
+    service = await trained_service()
+    requests = make_requests(1000)
+
+    for rows in (10_000, 100_000):
+        upload = write_upload(requests, rows // len(requests))
+        for name, fn in (("whole body", whole_body), ("streamed", streamed)):
+            elapsed, peak = await measure(fn, service, upload)
+            print(
+                f"rows={rows:7d}  {name:10s} {rows / elapsed:8.0f} rows/s  "
+                f"peak={peak / 2**20:7.1f} MiB"
+            )
+        upload.close()
+
+    await service.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
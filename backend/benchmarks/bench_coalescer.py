@@ -0,0 +1,41 @@
+"""Throughput of concurrent single predictions with and without micro-batching."""
+import asyncio
+import time
+
+from app.services.prediction_batcher import PredictionBatcher
+from benchmarks._common import make_requests, trained_service
+
+TOTAL_REQUESTS = 5000
+
+
+async def _drive(predict, requests, concurrency):
+    """Run ``concurrency`` clients that each issue predictions back to back"""
+    queue = iter(requests)
+
+    async def client():
+        for request in queue:
+            await predict(request)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return len(requests) / (time.perf_counter() - start)
+
+
+async def main():
+    service = await trained_service()
+    requests = make_requests(TOTAL_REQUESTS)
+    batcher = PredictionBatcher(service, max_wait_ms=2, max_batch_size=256)
+
+    for concurrency in (1, 16, 64, 256):
+        direct = await _drive(service.predict, requests, concurrency)
+        batched = await _drive(batcher.predict, requests, concurrency)
+        print(
+            f"clients={concurrency:4d}  direct={direct:9.0f} req/s  "
+            f"coalesced={batched:9.0f} req/s  ratio={batched / direct:5.2f}x"
+        )
+
+    await batcher.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,36 @@
+"""Dataset load time and resident size: CSV parsing versus the Feather cache."""
+import asyncio
+import os
+import tempfile
+
+import pandas as pd
+
+from app.core.config import settings
+from app.services.dataset_store import DatasetStore
+from benchmarks._common import atimeit, make_dataset, timeit
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.DATA_PATH = tmp
+        for rows in (100_000, 1_000_000):
+            path = os.path.join(tmp, f"accidents_{rows}.csv")
+            make_dataset(rows).to_csv(path, index=False)
+
+            csv_s = timeit(lambda: pd.read_csv(path), repeat=3)
+            csv_mb = pd.read_csv(path).memory_usage(deep=True).sum() / 2**20
+
+            store = DatasetStore(path)
+            await store.load()  # first load parses the CSV and writes the cache
+            cached_s = await atimeit(store.load, repeat=3)
+            cached_mb = store.data.memory_usage(deep=True).sum() / 2**20
+
+            print(
+                f"rows={rows:8d}  csv: {csv_s:6.2f} s {csv_mb:7.1f} MiB  "
+                f"cache: {cached_s:6.2f} s {cached_mb:7.1f} MiB  "
+                f"(load {csv_s / cached_s:4.1f}x faster, {csv_mb / cached_mb:4.1f}x smaller)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
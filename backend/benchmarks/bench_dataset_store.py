@@ -0,0 +1,30 @@
+"""Per-request dataset access: re-parsing the CSV versus the shared DatasetStore."""
+import asyncio
+import os
+import tempfile
+
+import pandas as pd
+
+from app.services.dataset_store import DatasetStore
+from benchmarks._common import atimeit, make_dataset, timeit
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (10_000, 100_000, 1_000_000):
+            path = os.path.join(tmp, f"accidents_{rows}.csv")
+            make_dataset(rows).to_csv(path, index=False)
+
+            store = DatasetStore(path)
+            await store.load()
+
+            parse_s = timeit(lambda: pd.read_csv(path), repeat=3)
+            shared_s = await atimeit(store.get_data, repeat=1000)
+            print(
+                f"rows={rows:8d}  read_csv={parse_s * 1000:9.1f} ms  "
+                f"store.get_data={shared_s * 1e6:7.1f} us  (initial load {store.load_time:.2f} s)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+"""Bytes saved per column by the dataset dtype optimization."""
+from app.services.dataset_store import optimize_dtypes
+from benchmarks._common import make_dataset
+
+ROWS = 1_000_000
+
+
+def main():
+    data = make_dataset(ROWS)
+    before = data.memory_usage(index=False, deep=True).sum()
+    report = optimize_dtypes(data)
+    after = data.memory_usage(index=False, deep=True).sum()
+
+    for col, entry in sorted(report.items(), key=lambda item: -item[1]['bytes_saved']):
+        print(
+            f"{col:30s} {entry['dtype_before']:>8s} -> {entry['dtype_after']:<9s} "
+            f"saved {entry['bytes_saved'] / 2**20:8.2f} MiB"
+        )
+    print(f"total: {before / 2**20:.1f} MiB -> {after / 2**20:.1f} MiB ({before / after:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Serialization cost of a 1000-item BatchPredictionResponse per encoding.
+
+"fastapi default" is the path the batch endpoint used before: response
+model validation, ``jsonable_encoder`` and stdlib ``json``. The others
+are what ``app.core.encoding.encode`` produces for each negotiated
+encoding. Model scoring is excluded.
+"""
+import asyncio
+import json
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.encoding import JSON, MSGPACK, available_encodings, encode
+from app.models.schemas import BatchPredictionResponse
+from benchmarks._common import make_requests, percentiles, trained_service
+
+ITEMS = 1000
+ROUNDS = 50
+
+
+async def fastapi_default(response, field):
+    content = await serialize_response(field=field, response_content=response, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def main():
+    service = await trained_service()
+    predictions = await service.predict_many(make_requests(ITEMS))
+    response = BatchPredictionResponse(
+        predictions=predictions,
+        batch_id="bench",
+        total_predictions=len(predictions),
+        processing_time=0.0
+    )
+    field = create_response_field(name="response", type_=BatchPredictionResponse)
+
+    cases = [
+        ('fastapi default (old)', lambda: fastapi_default(response, field)),
+        ('stdlib json.dumps', lambda: json.dumps(response.model_dump(mode="json")).encode()),
+        ('json (orjson)', lambda: encode(response, JSON)),
+    ]
+    if MSGPACK in available_encodings():
+        cases.append(('msgpack (compact)', lambda: encode(response, MSGPACK)))
+
+    for name, fn in cases:
+        samples = []
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            body = fn()
+            if asyncio.iscoroutine(body):
+                body = await body
+            samples.append(time.perf_counter() - start)
+        stats = percentiles(samples)
+        print(
+            f"{name:22s} p50={stats['p50_us'] / 1000:7.2f} ms  "
+            f"p99={stats['p99_us'] / 1000:7.2f} ms  {len(body) / 1024:7.1f} KiB"
+        )
+
+    await service.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+"""Cost of answering a health probe.
+
+Compares the full-prediction health check that used to back every probe
+with the background canary inference and the cached readiness answer the
+probes now return. Timings exclude HTTP handling.
+"""
+import asyncio
+import time
+
+from app.services.health_monitor import HealthMonitor
+from benchmarks._common import percentiles, trained_service
+
+CALLS = 2000
+
+
+async def _sample(fn):
+    samples = []
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+async def main():
+    service = await trained_service()
+    monitor = HealthMonitor(service)
+    await monitor.check_now()
+    
+    for name, fn in (
+        ('full predict (old)', service.health_check),
+        ('canary inference', service.canary),
+        ('cached readiness', monitor.readiness),
+    ):
+        stats = await _sample(fn)
+        print(f"{name:20s} p50={stats['p50_us']:9.1f} us  p99={stats['p99_us']:9.1f} us")
+    
+    await service.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
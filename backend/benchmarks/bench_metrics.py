@@ -0,0 +1,100 @@
+"""Per-request overhead of metrics collection.
+
+Times a bare Histogram.observe, a labelled lookup plus observe, an ASGI
+request to a trivial FastAPI route with and without MetricsMiddleware,
+and MLService._predict_one (prediction cache off) with metrics enabled
+and disabled. The overhead is the difference of the medians; the two
+variants of each comparison are timed alternately.
+"""
+import asyncio
+import gc
+import time
+
+from fastapi import FastAPI
+
+from app.core.metrics import HTTP_REQUEST_SECONDS, LATENCY_BUCKETS, Histogram, MetricsMiddleware, metrics
+from benchmarks._common import make_requests, percentiles, trained_service
+
+CALLS = 20_000
+
+
+def _sample(fn, calls=CALLS):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+async def _interleaved(first, second, calls=CALLS):
+    """Alternate two request paths so drift and GC pauses hit both alike"""
+    samples = ([], [])
+    gc.disable()
+    try:
+        for _ in range(calls):
+            for fn, times in zip((first, second), samples):
+                start = time.perf_counter()
+                await fn()
+                times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return percentiles(samples[0]), percentiles(samples[1])
+
+
+def _asgi_request(app):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ping", "raw_path": b"/ping", "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 1), "server": ("localhost", 80),
+    }
+    
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    async def send(message):
+        pass
+    
+    return lambda: app(dict(scope), receive, send)
+
+
+def _report(name, stats, baseline=None):
+    extra = f"  overhead {stats['p50_us'] - baseline['p50_us']:+6.2f} us" if baseline else ""
+    print(f"{name:34s} p50={stats['p50_us']:8.2f} us  p99={stats['p99_us']:8.2f} us{extra}")
+
+
+async def main():
+    histogram = Histogram(LATENCY_BUCKETS)
+    _report('Histogram.observe', _sample(lambda: histogram.observe(0.0042)))
+    _report('labels() + observe', _sample(lambda: HTTP_REQUEST_SECONDS.labels("GET", "/ping").observe(0.0042)))
+    
+    app = FastAPI()
+    
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+    
+    plain, measured = await _interleaved(_asgi_request(app), _asgi_request(MetricsMiddleware(app)))
+    _report('ASGI request, no middleware', plain)
+    _report('ASGI request, MetricsMiddleware', measured, plain)
+    
+    service = await trained_service(cache_size=0)
+    request = make_requests(1)[0]
+    samples = ([], [])
+    gc.disable()
+    for _ in range(5000):
+        for enabled, times in zip((False, True), samples):
+            metrics.enabled = enabled
+            start = time.perf_counter()
+            service._predict_one(request)
+            times.append(time.perf_counter() - start)
+    gc.enable()
+    disabled, enabled = percentiles(samples[0]), percentiles(samples[1])
+    _report('_predict_one, metrics disabled', disabled)
+    _report('_predict_one, stage timings', enabled, disabled)
+    
+    await service.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
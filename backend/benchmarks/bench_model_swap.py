@@ -0,0 +1,68 @@
+"""Cost of switching model versions, and consistency of predictions across swaps.
+
+Trains two versions, then times rolling back to the first while it is still
+compiled in memory and after evicting it (loaded from the registry). A
+second phase scores batches on the inference threads while versions are
+swapped back and forth, and checks that every response matches the output
+of the version it reports.
+"""
+import asyncio
+import time
+
+from app.core.config import settings
+from benchmarks._common import make_requests, trained_service
+
+SWAPS = 200
+
+
+async def main():
+    service = await trained_service()
+    first = service.model_version
+    await service.train_model()
+    second = service.model_version
+    
+    start = time.perf_counter()
+    await service.activate_version(first)
+    cached = time.perf_counter() - start
+    
+    service._plans.clear()
+    start = time.perf_counter()
+    await service.activate_version(second)
+    loaded = time.perf_counter() - start
+    print(f"rollback in memory {cached * 1000:8.2f} ms  from registry {loaded * 1000:8.2f} ms")
+    
+    # Expected probabilities per version, computed without concurrent swaps
+    requests = make_requests(64)
+    expected = {}
+    for version in (first, second):
+        await service.activate_version(version)
+        expected[version] = [r.probabilities for r in service._predict_batch(requests)]
+    
+    stop = asyncio.Event()
+    
+    async def swapper():
+        for i in range(SWAPS):
+            await service.activate_version((first, second)[i % 2])
+            await asyncio.sleep(0)
+        stop.set()
+    
+    async def scorer():
+        checked = mismatched = 0
+        while not stop.is_set():
+            responses = await service.predict_many(requests)
+            for i, response in enumerate(responses):
+                checked += 1
+                if response.probabilities != expected[response.model_version][i]:
+                    mismatched += 1
+        return checked, mismatched
+    
+    results = await asyncio.gather(swapper(), *(scorer() for _ in range(settings.INFERENCE_THREADS)))
+    checked = sum(c for c, _ in results[1:])
+    mismatched = sum(m for _, m in results[1:])
+    print(f"{SWAPS} swaps under load: {checked} responses checked, {mismatched} inconsistent")
+    
+    await service.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
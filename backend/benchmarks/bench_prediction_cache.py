@@ -0,0 +1,42 @@
+"""Latency of repeated prediction payloads with and without the prediction cache.
+
+Dashboards resend a small set of payloads, modelled here as 50 distinct
+requests cycled 40 times. Timings exclude the thread-pool hop.
+"""
+import asyncio
+import time
+
+from app.services.prediction_cache import PredictionCache
+from benchmarks._common import make_requests, percentiles, trained_service
+
+
+def _sample(fn, requests):
+    samples = []
+    for request in requests:
+        start = time.perf_counter()
+        fn(request)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+async def main():
+    service = await trained_service()
+    requests = make_requests(50) * 40
+
+    for name, size in (('uncached', 0), ('cached', 4096)):
+        service.prediction_cache = PredictionCache(size)
+        stats = _sample(service._predict_one, requests)
+        start = time.perf_counter()
+        service._predict_batch(requests)
+        batch_s = time.perf_counter() - start
+        print(
+            f"{name:8s} single p50={stats['p50_us']:7.1f} us  p99={stats['p99_us']:7.1f} us  "
+            f"batch of {len(requests)}={batch_s * 1000:7.2f} ms"
+        )
+    print(service.prediction_cache.get_stats())
+
+    await service.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
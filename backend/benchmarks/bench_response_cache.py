@@ -0,0 +1,29 @@
+"""/data/explore and /data/summary latency: computed versus served from the response cache."""
+import asyncio
+
+from app.services.data_service import DataService
+from app.services.dataset_store import DatasetStore
+from app.services.response_cache import ResponseCache
+from benchmarks._common import atimeit, make_compact_dataset
+
+FILTERS = {"Country": "USA", "Weather.Conditions": "Rainy"}
+
+
+async def main():
+    for rows in (100_000, 1_000_000):
+        store = DatasetStore.from_frame(make_compact_dataset(rows))
+        uncached = DataService(store, ResponseCache(max_entries=0))
+        cached = DataService(store)
+        for name, call in (
+            ("explore", lambda service: service.explore_feature("Speed.Limit", "histogram", FILTERS)),
+            ("summary", lambda service: service.get_summary_statistics()),
+        ):
+            cold_s = await atimeit(lambda: call(uncached), repeat=5)
+            await call(cached)
+            warm_s = await atimeit(lambda: call(cached), repeat=200)
+            print(f"rows={rows:8d}  {name:8s} computed={cold_s * 1000:8.2f} ms  cached={warm_s * 1e6:7.1f} us")
+        print(f"rows={rows:8d}  stats={cached.cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""Event-loop responsiveness while a model retrain is running.
+
+Trains on a large synthetic dataset and, meanwhile, issues a health check
+and a prediction every 10 ms, reporting the longest stall between two
+completed probes. "inline"
+runs the training function directly on the event loop (the old behaviour);
+"worker" goes through MLService.train_model and its training process.
+"""
+import asyncio
+import time
+
+from app.services.ml_service import _fit_model
+from app.services.dataset_store import DatasetStore
+from benchmarks._common import make_dataset, make_requests, trained_service
+
+TRAINING_ROWS = 300_000
+
+
+async def _probe(service, request, stop: asyncio.Event):
+    completed = [time.perf_counter()]
+    while not stop.is_set():
+        await service.health_check()
+        await service.predict(request)
+        completed.append(time.perf_counter())
+        await asyncio.sleep(0.01)
+    return completed
+
+
+async def _measure(service, train):
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(service, make_requests(1)[0], stop))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await train()
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.05)
+    stop.set()
+    completed = await probe
+    return elapsed, len(completed) - 1, max(b - a for a, b in zip(completed, completed[1:]))
+
+
+async def main():
+    service = await trained_service()
+    service.dataset_store = DatasetStore.from_frame(make_dataset(TRAINING_ROWS))
+
+    async def inline():
+        _fit_model(service.dataset_store.data, dict(service.feature_encoders))
+
+    for name, train in (('inline', inline), ('worker', service.train_model)):
+        elapsed, probes, stall = await _measure(service, train)
+        print(
+            f"{name:7s} training={elapsed:6.1f} s  probes={probes:5d}  "
+            f"longest stall={stall * 1000:9.1f} ms"
+        )
+
+    await service.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
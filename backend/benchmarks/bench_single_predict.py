@@ -0,0 +1,51 @@
+"""Per-request latency of MLService.predict before and after single-pass inference.
+
+"legacy" reproduces the old predict_proba + predict double call, "sklearn"
+is the single-pass path through XGBClassifier.predict_proba and "booster"
+is the inplace_predict fast path. Timings exclude the thread-pool hop so
+only the scoring path itself is compared.
+"""
+import asyncio
+import time
+
+import numpy as np
+
+from benchmarks._common import make_requests, percentiles, trained_service
+
+
+def _sample(fn, requests):
+    samples = []
+    for request in requests:
+        start = time.perf_counter()
+        fn(request)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+async def main():
+    service = await trained_service()
+    requests = make_requests(2000)
+    plan = service._plan
+
+    def legacy(request):
+        features = service._request_to_features(request)
+        proba = service.model.predict_proba([features])[0]
+        service.model.predict([features])[0]
+        return service._build_response(plan, request, features, proba, int(np.argmax(proba)))
+
+    results = {'legacy': _sample(legacy, requests)}
+
+    service._plan = plan._replace(booster=None)
+    results['sklearn'] = _sample(service._predict_one, requests)
+
+    service._plan = plan
+    results['booster'] = _sample(service._predict_one, requests)
+
+    for name, stats in results.items():
+        print(f"{name:8s} p50={stats['p50_us']:8.1f} us  p99={stats['p99_us']:8.1f} us")
+
+    await service.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""Time from process start to the first healthy /health response.
+
+Trains a model into a temporary registry, writes a synthetic dataset CSV,
+then starts the API with uvicorn several times and polls /health until the
+ML service reports healthy. The first /data/summary call afterwards shows
+the dataset load that startup no longer waits for. A last start with an
+empty registry shows how soon the API answers while its first model trains.
+"""
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from app.core.config import settings
+from benchmarks._common import make_dataset, trained_service
+
+DATASET_ROWS = 200_000
+RUNS = 7
+TIMEOUT = 600
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=TIMEOUT) as response:
+            return response.status, json.loads(response.read())
+    except OSError:
+        return None, None
+
+
+def _start(env) -> tuple:
+    """Seconds until /health first answers and until it is healthy, and the first /data/summary latency"""
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    answered = None
+    try:
+        while time.perf_counter() - start < TIMEOUT:
+            status, body = _get(f"http://127.0.0.1:{port}/health")
+            if status is not None and answered is None:
+                answered = time.perf_counter() - start
+            if status == 200 and body["ml_service"] == "healthy":
+                break
+            time.sleep(0.01)
+        else:
+            raise RuntimeError("API did not become healthy")
+        healthy = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        _get(f"http://127.0.0.1:{port}/api/v1/data/summary")
+        return answered, healthy, time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    workdir = Path(tempfile.mkdtemp(prefix="bench-startup-"))
+    dataset = workdir / "road_accident_dataset.csv"
+    make_dataset(DATASET_ROWS).to_csv(dataset, index=False)
+    
+    async def train():
+        service = await trained_service()
+        await service.cleanup()
+    asyncio.run(train())
+    
+    env = dict(
+        os.environ,
+        MODEL_PATH=settings.MODEL_PATH,
+        DATASET_FILE=str(dataset),
+        DATA_PATH=str(workdir / "data"),
+        LOGS_PATH=str(workdir / "logs")
+    )
+    # The first run also writes the dataset's columnar cache
+    runs = [_start(env) for _ in range(RUNS)]
+    runs.append(_start(dict(env, MODEL_PATH=str(workdir / "empty-registry"))))
+    
+    def report(name, answered, healthy, summary):
+        print(
+            f"{name:18s} first response {answered:6.2f} s  healthy {healthy:6.2f} s  "
+            f"first /data/summary {summary:6.2f} s"
+        )
+    
+    report("first start", *runs[0])
+    report("warm start median", *(statistics.median(run[i] for run in runs[1:-1]) for i in range(3)))
+    report("no saved model", *runs[-1])
+
+
+if __name__ == "__main__":
+    main()
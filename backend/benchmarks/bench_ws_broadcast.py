@@ -0,0 +1,103 @@
+"""Broadcast latency to many simulated WebSocket connections.
+
+Each fake connection takes a few microseconds per send. A broadcast is
+timed from the call until every healthy connection has received the
+frame, with and without a handful of stalled clients (each send blocks
+for STALL_SECONDS); "caller" is how long the broadcasting coroutine
+itself is held up. The old sequential loop is reproduced inline for
+comparison.
+"""
+import asyncio
+import json
+import time
+
+from app.services.websocket_manager import WebSocketManager
+
+MESSAGE = {
+    "type": "model_update",
+    "data": {"model_version": "v7", "accuracy": 0.87, "trained_at": "2026-01-01T00:00:00"},
+    "timestamp": 0.0,
+}
+STALLED = 10
+STALL_SECONDS = 0.2
+ROUNDS = 5
+
+
+class FakeWebSocket:
+    """Counts frames; stalled instances block on every send"""
+    
+    def __init__(self, tracker, stalled: bool = False):
+        self.tracker = tracker
+        self.stalled = stalled
+    
+    async def accept(self):
+        pass
+    
+    async def send_text(self, payload: str):
+        if self.stalled:
+            await asyncio.sleep(STALL_SECONDS)
+            return
+        self.tracker.received()
+
+
+class Tracker:
+    def __init__(self):
+        self.expected = 0
+        self.count = 0
+        self.done = asyncio.Event()
+    
+    def arm(self, expected: int):
+        self.expected, self.count = expected, 0
+        self.done.clear()
+    
+    def received(self):
+        self.count += 1
+        if self.count == self.expected:
+            self.done.set()
+
+
+async def sequential_broadcast(connections):
+    """The previous implementation: serialize and await each send in turn"""
+    for connection in connections:
+        await connection.send_text(json.dumps(MESSAGE))
+
+
+async def _measure(connections, healthy, tracker, broadcast):
+    best = caller = float('inf')
+    for _ in range(ROUNDS):
+        tracker.arm(healthy)
+        start = time.perf_counter()
+        await broadcast()
+        caller = min(caller, time.perf_counter() - start)
+        await tracker.done.wait()
+        best = min(best, time.perf_counter() - start)
+        # Let stalled sends finish before the next round
+        await asyncio.sleep(STALL_SECONDS * 1.5)
+    return best, caller
+
+
+async def main():
+    for count in (1_000, 10_000):
+        for stalled in (0, STALLED):
+            tracker = Tracker()
+            connections = [FakeWebSocket(tracker, stalled=i < stalled) for i in range(count)]
+            healthy = count - stalled
+            
+            old = await _measure(connections, healthy, tracker, lambda: sequential_broadcast(connections))
+            
+            manager = WebSocketManager(send_timeout=10 * STALL_SECONDS)
+            for connection in connections:
+                await manager.connect(connection)
+            new = await _measure(connections, healthy, tracker, lambda: manager.broadcast(MESSAGE))
+            for connection in connections:
+                manager.disconnect(connection)
+            
+            print(
+                f"{count:6d} connections, {stalled:2d} stalled  "
+                f"sequential {old[0] * 1000:8.1f} ms (caller {old[1] * 1000:8.1f} ms)  "
+                f"fan-out {new[0] * 1000:8.1f} ms (caller {new[1] * 1000:6.1f} ms)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""Connect/disconnect churn and stats cost at 10k WebSocket connections.
+
+The list-based registry used before is reproduced inline. Each scenario
+connects CONNECTIONS fake sockets, then disconnects them in random order;
+"mass drop" disconnects half of them at once, as after a network blip.
+"""
+import asyncio
+import random
+import time
+
+from app.services.websocket_manager import WebSocketManager
+
+CONNECTIONS = 10_000
+
+
+class FakeWebSocket:
+    async def accept(self):
+        pass
+    
+    async def send_text(self, payload: str):
+        pass
+
+
+class ListRegistry:
+    """The previous registry: a list of sockets plus a dict of per-socket stats"""
+    
+    def __init__(self):
+        self.active_connections = []
+        self.connection_data = {}
+    
+    async def connect(self, websocket):
+        await websocket.accept()
+        self.active_connections.append(websocket)
+        self.connection_data[websocket] = {
+            "connected_at": asyncio.get_event_loop().time(),
+            "predictions_count": 0
+        }
+    
+    def disconnect(self, websocket):
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+            if websocket in self.connection_data:
+                del self.connection_data[websocket]
+    
+    def get_connection_stats(self):
+        return {
+            "active_connections": len(self.active_connections),
+            "total_predictions": sum(data["predictions_count"] for data in self.connection_data.values())
+        }
+
+
+async def _churn(registry, sockets, order, stats):
+    start = time.perf_counter()
+    for websocket in sockets:
+        await registry.connect(websocket)
+    connected = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for _ in range(1000):
+        stats()
+    stats_time = (time.perf_counter() - start) / 1000
+    
+    start = time.perf_counter()
+    for websocket in order[:len(order) // 2]:
+        registry.disconnect(websocket)
+    dropped = time.perf_counter() - start
+    
+    for websocket in order[len(order) // 2:]:
+        registry.disconnect(websocket)
+    return connected, dropped, stats_time
+
+
+async def main():
+    sockets = [FakeWebSocket() for _ in range(CONNECTIONS)]
+    order = random.Random(0).sample(sockets, len(sockets))
+    
+    old = ListRegistry()
+    new = WebSocketManager()
+    for name, registry, stats in (
+        ('list registry (old)', old, old.get_connection_stats),
+        ('id registry', new, lambda: new.get_connection_stats(detail=False)),
+    ):
+        connected, dropped, stats_time = await _churn(registry, sockets, order, stats)
+        print(
+            f"{name:20s} connect {connected / CONNECTIONS * 1e6:6.1f} us/conn  "
+            f"mass drop of {CONNECTIONS // 2} {dropped * 1000:8.1f} ms  "
+            f"stats {stats_time * 1e6:8.1f} us"
+        )
+    await new.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""Prediction throughput of a single WebSocket connection.
+
+"lockstep" sends one request and waits for its reply before sending the
+next, which is all the old endpoint allowed. "pipelined" sends REQUESTS
+frames with correlation IDs without waiting; "array" sends them as
+frames of ARRAY_SIZE requests. Frames are fed through an in-memory socket,
+so the numbers exclude network time.
+"""
+import asyncio
+import json
+import time
+
+from fastapi import WebSocketDisconnect
+
+from app.services.prediction_batcher import PredictionBatcher
+from app.services.prediction_stream import PredictionStream
+from app.services.websocket_manager import WebSocketManager
+from benchmarks._common import make_requests, trained_service
+
+REQUESTS = 2000
+ARRAY_SIZE = 100
+
+
+class MemoryWebSocket:
+    """Client frames come from a queue; server frames land in another"""
+    
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+    
+    async def accept(self):
+        pass
+    
+    async def receive(self) -> dict:
+        frame = await self.incoming.get()
+        if frame is None:
+            return {"type": "websocket.disconnect", "code": 1000}
+        return {"type": "websocket.receive", "text": frame}
+    
+    async def send_text(self, payload: str):
+        self.outgoing.put_nowait(payload)
+
+
+async def _count_predictions(websocket, expected):
+    received = 0
+    while received < expected:
+        reply = json.loads(await websocket.outgoing.get())
+        received += len(reply["data"]) if reply["type"] == "predictions" else 1
+
+
+async def lockstep(websocket, payloads):
+    for payload in payloads:
+        await websocket.incoming.put(json.dumps(payload))
+        await _count_predictions(websocket, 1)
+
+
+async def pipelined(websocket, payloads):
+    for i, payload in enumerate(payloads):
+        websocket.incoming.put_nowait(json.dumps({**payload, "id": i}))
+    await _count_predictions(websocket, len(payloads))
+
+
+async def array(websocket, payloads):
+    for start in range(0, len(payloads), ARRAY_SIZE):
+        websocket.incoming.put_nowait(json.dumps(payloads[start:start + ARRAY_SIZE]))
+    await _count_predictions(websocket, len(payloads))
+
+
+async def main():
+    service = await trained_service()
+    batcher = PredictionBatcher(service)
+    manager = WebSocketManager()
+    payloads = [request.model_dump(mode="json") for request in make_requests(REQUESTS)]
+    
+    for name, client in (('lockstep (old)', lockstep), ('pipelined', pipelined), ('array frames', array)):
+        websocket = MemoryWebSocket()
+        await manager.connect(websocket)
+        stream = PredictionStream(websocket, manager, service, batcher)
+        server = asyncio.create_task(stream.run())
+        
+        start = time.perf_counter()
+        await client(websocket, payloads)
+        elapsed = time.perf_counter() - start
+        
+        websocket.incoming.put_nowait(None)
+        try:
+            await server
+        except WebSocketDisconnect:
+            pass
+        manager.disconnect(websocket)
+        print(f"{name:16s} {REQUESTS / elapsed:9.0f} predictions/s  ({elapsed * 1000:7.1f} ms)")
+    
+    await manager.close()
+    await service.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Keep test models and logs out of the working tree; read when settings load
+os.environ.setdefault("MODEL_PATH", tempfile.mkdtemp(prefix="test-models-"))
+os.environ.setdefault("LOGS_PATH", tempfile.mkdtemp(prefix="test-logs-"))
@@ -0,0 +1,74 @@
+"""Filtered exploration selects exactly the rows a plain pandas filter does."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.category_index import CategoryIndex
+from app.services.data_service import DataService
+from app.services.dataset_store import CATEGORY_COLUMNS, DatasetStore
+from benchmarks._common import make_dataset
+
+FILTERS = [
+    {},
+    {"Country": "USA"},
+    {"Country": "USA", "Weather.Conditions": "Rainy"},
+    {"Country": "USA", "Weather.Conditions": "Rainy", "Road.Type": "Highway", "Time.of.Day": "Night"},
+    # Values that never occur, in an indexed and an unindexed column
+    {"Country": "Atlantis"},
+    {"Country": "USA", "Speed.Limit": 1000},
+    # Indexed and numeric filters together, and numeric ones alone
+    {"Weather.Conditions": "Snowy", "Speed.Limit": 50},
+    {"Speed.Limit": 50, "Driver.Fatigue": 1},
+    # Columns that are not in the dataset are ignored
+    {"Country": "UK", "No.Such.Column": "x"},
+]
+
+
+@pytest.fixture(scope="module")
+def data() -> pd.DataFrame:
+    raw = make_dataset(20_000)
+    # Missing categories must match no filter, and must not break the index
+    raw.loc[::7, "Country"] = None
+    return DatasetStore()._normalize(raw)[0]
+
+
+def _pandas_filter(data: pd.DataFrame, feature: str, filters) -> pd.Series:
+    mask = np.ones(len(data), dtype=bool)
+    for key, value in filters.items():
+        if key in data.columns:
+            mask &= (data[key] == value).to_numpy()
+    return data[feature][mask]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_select_matches_pandas_with_and_without_index(data, filters):
+    service = DataService(DatasetStore.from_frame(data))
+    index = CategoryIndex.build(data, CATEGORY_COLUMNS)
+    assert "Country" in index and "Weather.Conditions" in index
+    expected = _pandas_filter(data, "Speed.Limit", filters)
+    
+    # The posting-list intersection, then the boolean mask fallback
+    for used in (index, None):
+        pd.testing.assert_series_equal(service._select(data, used, "Speed.Limit", filters), expected)
+
+
+def test_select_ignores_an_index_built_for_other_data(data):
+    service = DataService(DatasetStore.from_frame(data))
+    stale = CategoryIndex.build(data.iloc[:100], CATEGORY_COLUMNS)
+    filters = {"Country": "USA", "Weather.Conditions": "Clear"}
+    
+    pd.testing.assert_series_equal(
+        service._select(data, stale, "Speed.Limit", filters),
+        _pandas_filter(data, "Speed.Limit", filters)
+    )
+
+
+def test_index_select_leaves_unindexed_filters_to_the_caller(data):
+    index = CategoryIndex.build(data, CATEGORY_COLUMNS)
+    
+    positions, remaining = index.select({"Country": "USA", "Speed.Limit": 50, "Month": "March"})
+    
+    assert remaining == {"Speed.Limit": 50}
+    expected = np.flatnonzero((data["Country"] == "USA").to_numpy() & (data["Month"] == "March").to_numpy())
+    np.testing.assert_array_equal(positions, expected)
+    assert index.select({"Speed.Limit": 50}) == (None, {"Speed.Limit": 50})
@@ -0,0 +1,35 @@
+"""Loads from the Feather cache match a fresh CSV parse, memory report included."""
+import asyncio
+
+import pandas as pd
+
+from app.core.config import settings
+from app.services.dataset_store import DatasetStore
+from benchmarks._common import make_dataset
+
+
+def _load(path) -> DatasetStore:
+    store = DatasetStore(str(path))
+    asyncio.run(store.load())
+    return store
+
+
+def test_cached_load_keeps_data_and_memory_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATA_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "DATASET_CACHE_ENABLED", True)
+    path = tmp_path / "accidents.csv"
+    make_dataset(2000).to_csv(path, index=False)
+    
+    parsed = _load(path)
+    assert list(tmp_path.glob("accidents.*.feather"))
+    
+    # A second store has to come from the cache: the CSV can no longer be parsed
+    def no_csv(*args, **kwargs):
+        raise AssertionError("CSV parsed again")
+    monkeypatch.setattr(pd, "read_csv", no_csv)
+    cached = _load(path)
+    
+    pd.testing.assert_frame_equal(cached.data, parsed.data)
+    assert parsed.memory_report["Speed.Limit"]["dtype_after"] == "int8"
+    assert parsed.memory_report["Country"]["dtype_after"] == "category"
+    assert cached.memory_report == parsed.memory_report
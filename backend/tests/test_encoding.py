@@ -0,0 +1,94 @@
+"""Content negotiation and the JSON and msgpack codecs."""
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+from enum import Enum
+
+import msgpack
+import pytest
+
+from app.core import encoding
+from app.core.encoding import JSON, MSGPACK, decode, encode, negotiate, negotiate_subprotocol
+from app.models.schemas import AccidentSeverity
+
+
+class Shade(str, Enum):
+    LIGHT = "light"
+    SHARED = "shared"
+
+
+class Tone(str, Enum):
+    SHARED = "shared"
+    DARK = "dark"
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON),
+    ("", JSON),
+    ("application/msgpack", MSGPACK),
+    ("application/x-msgpack", MSGPACK),
+    ("application/json, application/msgpack", JSON),
+    ("application/json;q=0.5, application/msgpack", MSGPACK),
+    ("application/msgpack;q=0.8, application/json;q=0.9", JSON),
+    # Equal quality keeps the client's order
+    ("application/msgpack;q=0.5, application/json;q=0.5", MSGPACK),
+    ("application/msgpack;q=0, */*", JSON),
+    ("application/msgpack;q=bogus, application/json;q=0.1", JSON),
+    ("text/html", JSON),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def test_negotiate_falls_back_to_json_without_msgpack(monkeypatch):
+    monkeypatch.setattr(encoding, "msgpack", None)
+    
+    assert negotiate("application/msgpack") == JSON
+    assert negotiate_subprotocol(["msgpack"]) is None
+
+
+def test_negotiate_subprotocol_picks_first_known():
+    assert negotiate_subprotocol(["v2.example", "msgpack", "json"]) == MSGPACK
+    assert negotiate_subprotocol(["v2.example"]) is None
+
+
+def test_msgpack_sends_enum_positions():
+    assert msgpack.unpackb(encode({"severity": AccidentSeverity.SEVERE}, MSGPACK)) == {"severity": 2}
+
+
+def test_msgpack_keeps_enums_sharing_a_value_apart():
+    # Shade.SHARED == Tone.SHARED as strings, but their positions differ
+    payload = [Shade.SHARED, Tone.SHARED, Tone.SHARED, Shade.SHARED]
+    
+    assert msgpack.unpackb(encode(payload, MSGPACK)) == [1, 0, 0, 1]
+
+
+def test_msgpack_sends_epoch_datetimes():
+    moment = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+    
+    assert msgpack.unpackb(encode({"at": moment}, MSGPACK)) == {"at": 1704112200.0}
+
+
+def test_msgpack_packs_dict_and_list_subclasses():
+    counts = defaultdict(list, {"a": [1]})
+    payload = OrderedDict([("counts", counts), ("pair", (1, 2))])
+    
+    assert msgpack.unpackb(encode(payload, MSGPACK)) == {"counts": {"a": [1]}, "pair": [1, 2]}
+
+
+def test_json_round_trip():
+    assert decode(encode({"severity": AccidentSeverity.MINOR, "n": [1, 2]})) == {"severity": "Minor", "n": [1, 2]}
+
+
+@pytest.mark.parametrize("frame, frame_encoding", [
+    ('{"speed_limit": ', JSON),
+    (b'{"speed_limit": ', JSON),
+    (b"\xc1", MSGPACK),
+    (b"\x92\x01", MSGPACK),
+])
+def test_malformed_frames_raise_value_error(frame, frame_encoding):
+    with pytest.raises(ValueError):
+        decode(frame, frame_encoding)
+
+
+def test_text_frames_are_json_on_msgpack_connections():
+    assert decode('{"id": 1}', MSGPACK) == {"id": 1}
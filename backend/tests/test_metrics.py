@@ -0,0 +1,38 @@
+"""The /metrics endpoint is served in a form Prometheus accepts, and counts what it says."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.metrics import PREDICTION_BATCH_SIZE
+from app.main import app
+from benchmarks._common import make_requests, trained_service
+
+
+def test_metrics_content_type_has_one_charset():
+    response = TestClient(app, base_url="http://localhost").get("/metrics")
+    
+    assert response.status_code == 200
+    # Prometheus 3 rejects a media type that repeats a parameter
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+
+async def _batch_sizes_with_cache_hits():
+    service = await trained_service(rows=2000, cache_size=100)
+    try:
+        requests = make_requests(5)
+        before = sum(PREDICTION_BATCH_SIZE.counts), PREDICTION_BATCH_SIZE.sum
+        await service.predict_many(requests)
+        # All five are cache hits now, so no model call is made
+        await service.predict_many(requests)
+        await service.predict_many(requests[:2] + make_requests(3, seed=8))
+        return sum(PREDICTION_BATCH_SIZE.counts) - before[0], PREDICTION_BATCH_SIZE.sum - before[1]
+    finally:
+        await service.cleanup()
+
+
+def test_batch_size_counts_model_calls_not_cache_hits():
+    calls, rows = asyncio.run(_batch_sizes_with_cache_hits())
+    
+    assert calls == 2
+    assert rows == 5 + 3
@@ -0,0 +1,154 @@
+"""Saving, activating, pruning and importing versions in the model registry."""
+import json
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.preprocessing import LabelEncoder
+
+from app.models.schemas import ModelPerformanceMetrics
+from app.services.model_registry import (
+    LEGACY_ENCODERS_FILE,
+    LEGACY_MODEL_FILE,
+    MANIFEST_FILE,
+    ModelRegistry,
+)
+
+
+def _model(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(size=(60, 3))
+    y = np.arange(60) % 3
+    model = xgb.XGBClassifier(n_estimators=3, max_depth=2)
+    model.fit(X, y)
+    return model, X
+
+
+def _encoders():
+    return {
+        'Weather.Conditions': LabelEncoder().fit(["Rainy", "Clear", "Snowy"]),
+        'Accident.Severity': LabelEncoder().fit(["Minor", "Moderate", "Severe"]),
+    }
+
+
+def _metrics(accuracy: float) -> ModelPerformanceMetrics:
+    return ModelPerformanceMetrics(
+        accuracy=accuracy,
+        precision={},
+        recall={},
+        f1_score={},
+        confusion_matrix=[],
+        feature_importance={},
+        model_version="unsaved",
+        last_updated=datetime.now()
+    )
+
+
+def test_empty_registry_has_no_active_version(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    
+    assert registry.active_version() is None
+    assert registry.list_versions() == []
+
+
+def test_save_twice_and_activate_the_first(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    first, X = _model(0)
+    second, _ = _model(1)
+    
+    v1, _, metrics = registry.save(first, _encoders(), _metrics(0.7))
+    v2, _, _ = registry.save(second, _encoders(), _metrics(0.8))
+    
+    assert (v1, v2) == ("v1", "v2")
+    assert metrics.model_version == "v1"
+    assert registry.active_version() == "v2"
+    assert [(info.version, info.active) for info in registry.list_versions()] == [("v2", True), ("v1", False)]
+    
+    registry.activate("v1")
+    # A new registry reads the state back from disk, as after a restart
+    reopened = ModelRegistry(str(tmp_path))
+    assert reopened.active_version() == "v1"
+    
+    model, encoders, loaded_metrics, _ = reopened.load("v1")
+    np.testing.assert_allclose(model.predict_proba(X), first.predict_proba(X), rtol=1e-6)
+    assert loaded_metrics.accuracy == 0.7
+    assert loaded_metrics.model_version == "v1"
+
+
+def test_unknown_versions_raise_key_error(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    registry.save(_model()[0], _encoders(), _metrics(0.7))
+    
+    with pytest.raises(KeyError):
+        registry.activate("v9")
+    with pytest.raises(KeyError):
+        registry.load("v9")
+    assert registry.active_version() == "v1"
+
+
+def test_encoders_reload_from_json(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    original = _encoders()
+    version, _, _ = registry.save(_model()[0], original, _metrics(0.7))
+    
+    _, encoders, _, _ = registry.load(version)
+    
+    assert json.loads((tmp_path / version / "encoders.json").read_text())['Weather.Conditions'] == [
+        "Clear", "Rainy", "Snowy"
+    ]
+    for col, encoder in original.items():
+        assert list(encoders[col].classes_) == list(encoder.classes_)
+        labels = list(encoder.classes_)
+        assert list(encoders[col].transform(labels)) == list(encoder.transform(labels))
+        assert list(encoders[col].inverse_transform([2, 0])) == list(encoder.inverse_transform([2, 0]))
+
+
+def test_prune_drops_the_oldest_versions_beyond_keep(tmp_path):
+    registry = ModelRegistry(str(tmp_path), keep=2)
+    model, _ = _model()
+    for accuracy in (0.6, 0.7, 0.8):
+        registry.save(model, _encoders(), _metrics(accuracy))
+    
+    assert [info.version for info in registry.list_versions()] == ["v3", "v2"]
+    assert sorted(path.name for path in tmp_path.iterdir() if path.is_dir()) == ["v2", "v3"]
+    with pytest.raises(KeyError):
+        registry.load("v1")
+    
+    # Version numbers are never reused after pruning
+    version, _, _ = registry.save(model, _encoders(), _metrics(0.9))
+    assert version == "v4"
+    assert [info.version for info in registry.list_versions()] == ["v4", "v3"]
+
+
+def test_manifest_is_replaced_without_leftovers(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    model, _ = _model()
+    registry.save(model, _encoders(), _metrics(0.7))
+    registry.save(model, _encoders(), _metrics(0.8))
+    registry.activate("v1")
+    
+    assert sorted(path.name for path in tmp_path.iterdir()) == [MANIFEST_FILE, "v1", "v2"]
+    manifest = json.loads((tmp_path / MANIFEST_FILE).read_text())
+    assert manifest["active"] == "v1"
+    assert manifest["next"] == 3
+
+
+def test_legacy_files_are_imported_as_v1(tmp_path):
+    model, X = _model()
+    joblib.dump(model, tmp_path / LEGACY_MODEL_FILE)
+    joblib.dump(_encoders(), tmp_path / LEGACY_ENCODERS_FILE)
+    registry = ModelRegistry(str(tmp_path))
+    
+    assert registry.active_version() == "v1"
+    loaded, encoders, metrics, _ = registry.load("v1")
+    np.testing.assert_allclose(loaded.predict_proba(X), model.predict_proba(X), rtol=1e-6)
+    assert list(encoders['Accident.Severity'].classes_) == ["Minor", "Moderate", "Severe"]
+    assert metrics is None
+    
+    # The next save continues after the imported version and stores natively
+    version, _, _ = registry.save(model, _encoders(), _metrics(0.8))
+    assert version == "v2"
+    assert (tmp_path / version / "model.ubj").exists()
+    assert [info.version for info in registry.list_versions()] == ["v2", "v1"]
@@ -0,0 +1,40 @@
+"""Prediction routes answer 503 with Retry-After until the first model is ready."""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app, ml_service
+from benchmarks._common import make_requests
+
+
+@pytest.fixture
+def client():
+    # Without the lifespan nothing is loaded or trained, as right after a fresh start
+    assert not ml_service.is_loaded
+    return TestClient(app, base_url="http://localhost")
+
+
+def _assert_not_ready(response):
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(settings.MODEL_NOT_READY_RETRY_AFTER_SECONDS)
+    assert "No model is loaded yet" in response.json()["detail"]
+
+
+def test_predict_before_model_is_ready(client):
+    request = make_requests(1)[0]
+    response = client.post(
+        "/api/v1/predict", content=request.model_dump_json(), headers={"content-type": "application/json"}
+    )
+    _assert_not_ready(response)
+
+
+def test_batch_predict_before_model_is_ready(client):
+    body = '{"predictions": [' + ",".join(request.model_dump_json() for request in make_requests(3)) + ']}'
+    response = client.post("/api/v1/predict/batch", content=body, headers={"content-type": "application/json"})
+    _assert_not_ready(response)
+
+
+def test_stream_before_model_is_ready(client):
+    body = "".join(request.model_dump_json() + "\n" for request in make_requests(3))
+    response = client.post("/api/v1/predict/stream", content=body)
+    _assert_not_ready(response)
@@ -0,0 +1,59 @@
+"""Health checks and predictions keep being answered while a model retrains."""
+import asyncio
+import time
+
+from app.services.dataset_store import DatasetStore
+from app.services.ml_service import HEALTH_CHECK_REQUEST, MLService
+from benchmarks._common import make_dataset
+
+TRAINING_ROWS = 100_000
+
+
+async def _probe(service: MLService, stop: asyncio.Event):
+    """Alternate health checks and predictions; returns when each round completed"""
+    completed = [time.perf_counter()]
+    speed = 30
+    while not stop.is_set():
+        assert await service.health_check() == "healthy"
+        # A different request each round, so the prediction cache does not answer
+        speed = 30 + (speed + 1) % 90
+        prediction = await service.predict(HEALTH_CHECK_REQUEST.model_copy(update={"speed_limit": speed}))
+        assert prediction.model_version == service.model_version
+        completed.append(time.perf_counter())
+        await asyncio.sleep(0.01)
+    return completed
+
+
+async def _retrain_while_probing():
+    service = MLService(DatasetStore.from_frame(make_dataset(TRAINING_ROWS)))
+    try:
+        # A first model to serve, which also starts the training worker
+        await service.train_model()
+        first_version = service.model_version
+        
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(service, stop))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await service.train_model()
+        training_seconds = time.perf_counter() - start
+        await asyncio.sleep(0.05)
+        stop.set()
+        completed = await probe
+    finally:
+        await service.cleanup()
+    
+    longest_gap = max(b - a for a, b in zip(completed, completed[1:]))
+    return first_version, service.model_version, training_seconds, len(completed) - 1, longest_gap
+
+
+def test_health_checks_and_predictions_stay_responsive_during_retrain():
+    first_version, version, training_seconds, probes, longest_gap = asyncio.run(_retrain_while_probing())
+    
+    summary = f"training {training_seconds:.2f} s, {probes} probes, longest gap {longest_gap * 1000:.0f} ms"
+    assert version != first_version
+    # Training on the event loop would stall probes for the whole run
+    assert training_seconds > 0.5, summary
+    assert probes >= 10, summary
+    assert longest_gap < training_seconds / 5, summary
+    assert longest_gap < 0.5, summary